@@ -0,0 +1,43 @@
+"""
+Runs all (or the named) benchmarks:
+
+    $ python -m benchmarks [--save results.json] [--compare results.json] [requests json ...]
+
+--save writes the results (with the commit and library versions) so a
+later run on another commit can --compare against them
+"""
+import argparse
+import importlib
+
+from . import utils
+
+BENCHMARKS = ["config", "json", "page", "requests"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("names", nargs="*", metavar="name",
+                        help="benchmarks to run: %s (default: all)" % ", ".join(BENCHMARKS))
+    parser.add_argument("--save", metavar="PATH", help="save the results as json")
+    parser.add_argument("--compare", metavar="PATH", help="compare with results saved by --save")
+    args = parser.parse_args(argv)
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark %r" % name)
+
+    if args.compare:
+        baseline = utils.load_results(args.compare)
+        utils.BASELINE.update(baseline["results"])
+        print("Compared with %s" % baseline["environment"])
+
+    for name in args.names or BENCHMARKS:
+        importlib.import_module("benchmarks.bench_%s" % name).main()
+        print()
+
+    if args.save:
+        utils.save_results(args.save)
+        print("Saved results to %s" % args.save)
+
+
+if __name__ == "__main__":
+    main()
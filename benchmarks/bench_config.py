@@ -0,0 +1,30 @@
+"""
+Compares resolving the settings-driven classes with import_string on
+every call against the cached registry in drf_inertia.config
+
+    $ python -m benchmarks.bench_config
+"""
+from .utils import setup_django, bench, report
+
+
+def main():
+    setup_django()
+
+    from django.utils.module_loading import import_string
+    from drf_inertia import config
+
+    results = [
+        ("shared serializer: import_string",
+         bench(lambda: import_string(config.SHARED_DATA_SERIALIZER))),
+        ("shared serializer: registry",
+         bench(config.get_shared_serializer_class)),
+        ("exception handler: import_string + instance",
+         bench(lambda: import_string(config.EXCEPTION_HANDLER)())),
+        ("exception handler: registry",
+         bench(config.get_exception_handler)),
+    ]
+    report("Settings resolution per request", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares the INERTIA_JSON_BACKENDs encoding typical inertia page
+objects: lists of serialized model rows (strings only) and of raw
+model values (datetimes, decimals and uuids)
+
+    $ python -m benchmarks.bench_json
+"""
+import datetime
+import uuid
+from decimal import Decimal
+
+from .utils import setup_django, bench, report
+
+
+def raw_row(i):
+    return {
+        "id": i,
+        "uuid": uuid.uuid4(),
+        "name": "User %d" % i,
+        "email": "user%d@example.com" % i,
+        "is_active": i % 2 == 0,
+        "balance": Decimal("%d.25" % i),
+        "created": datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc) + datetime.timedelta(minutes=i),
+        "tags": ["a", "b", "c"],
+    }
+
+
+def serialized_row(i):
+    return {key: str(value) if isinstance(value, (uuid.UUID, Decimal, datetime.datetime)) else value
+            for key, value in raw_row(i).items()}
+
+
+def page(rows):
+    return {
+        "component": "Users/List",
+        "props": {"users": rows, "errors": {}, "flash": {}},
+        "url": "/users",
+        "version": "unversioned",
+    }
+
+
+def main():
+    setup_django()
+
+    from rest_framework.renderers import JSONRenderer
+    from drf_inertia.encoders import JSONBackend, OrjsonBackend, UjsonBackend
+
+    renderer = JSONRenderer()
+    backends = [backend() for backend in (JSONBackend, OrjsonBackend, UjsonBackend) if backend.available]
+
+    for size in (1000, 10000):
+        for kind, make_row in (("serialized", serialized_row), ("raw", raw_row)):
+            data = page([make_row(i) for i in range(size)])
+            number = max(1, 10000 // size)
+            results = [("rest_framework JSONRenderer", bench(lambda: renderer.render(data), number=number))]
+            for backend in backends:
+                results.append((backend.__class__.__name__, bench(lambda: backend.encode(data), number=number)))
+            report("%d %s rows" % (size, kind), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Compares building the page object with the InertiaSerializer against
+drf_inertia.serializers.get_page
+
+    $ python -m benchmarks.bench_page
+"""
+from .utils import setup_django, bench, report
+
+
+def main():
+    setup_django()
+
+    from rest_framework.request import Request
+    from rest_framework.response import Response
+    from rest_framework.test import APIRequestFactory
+    from drf_inertia.negotiation import Inertia
+    from drf_inertia.serializers import InertiaSerializer, get_page
+
+    request = Request(APIRequestFactory().get('/users', HTTP_X_INERTIA=True))
+    request.inertia = Inertia.from_request(request, "Users/List")
+    request.inertia.data = {"users": [{"id": i, "name": "User %d" % i} for i in range(20)]}
+    context = {"request": request, "response": Response(), "view": None}
+
+    results = [
+        ("InertiaSerializer", bench(lambda: InertiaSerializer(request.inertia, context=context).data, number=2000)),
+        ("get_page", bench(lambda: get_page(request.inertia, context), number=2000)),
+    ]
+    report("Page object per request", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Measures the full @inertia request / response cycle (dispatch, negotiation,
+props, shared data, encoding and rendering) for function views, class views
+and viewsets with small, medium and large payloads:
+
+- html:     the first visit, rendering the page into the template
+- json:     an X-Inertia visit
+- partial:  a partial reload of a single small prop
+- conflict: an X-Inertia visit with a stale asset version (409)
+- invalid:  a POST failing validation, redirected by the exception handler
+- middleware conflict: the conflict answered by InertiaVersionMiddleware
+
+    $ python -m benchmarks.bench_requests
+"""
+from .utils import setup_django, bench, report
+
+
+SIZES = {
+    # rows, calls per repeat
+    "small": (10, 500),
+    "medium": (500, 50),
+    "large": (5000, 5),
+}
+
+TEMPLATES = [{
+    "BACKEND": "django.template.backends.django.DjangoTemplates",
+    "OPTIONS": {
+        "loaders": [("django.template.loaders.locmem.Loader", {
+            "index.html": '<!DOCTYPE html><html><body><div id="app" data-page="{{ inertia_json }}"></div></body></html>',
+        })],
+    },
+}]
+
+
+def rows(count):
+    return [{
+        "id": i,
+        "name": "User %d" % i,
+        "email": "user%d@example.com" % i,
+        "is_active": i % 2 == 0,
+        "tags": ["a", "b", "c"],
+    } for i in range(count)]
+
+
+def make_views(data):
+    from rest_framework import serializers, viewsets
+    from rest_framework.decorators import api_view
+    from rest_framework.response import Response
+    from rest_framework.views import APIView
+    from drf_inertia.decorators import inertia
+    from drf_inertia.middleware import InertiaVersionMiddleware
+
+    class UserSerializer(serializers.Serializer):
+        name = serializers.CharField(max_length=5)
+
+    def create(request):
+        UserSerializer(data=request.data).is_valid(raise_exception=True)
+
+    @inertia("Users/List")
+    @api_view(["GET", "POST"])
+    def function_view(request):
+        if request.method == "POST":
+            create(request)
+        return Response(data=data)
+
+    @inertia("Users/List")
+    class ClassView(APIView):
+        def get(self, request):
+            return Response(data=data)
+
+        def post(self, request):
+            create(request)
+
+    @inertia("Users/List", create="Users/Create")
+    class UserViewSet(viewsets.ViewSet):
+        def list(self, request):
+            return Response(data=data)
+
+        def create(self, request):
+            create(request)
+
+    return {
+        "function": function_view,
+        "class": ClassView.as_view(),
+        "viewset": UserViewSet.as_view({"get": "list", "post": "create"}),
+        "middleware": InertiaVersionMiddleware(function_view),
+    }
+
+
+def make_requests():
+    from django.contrib.sessions.backends.cache import SessionStore
+    from rest_framework.test import APIRequestFactory
+
+    factory = APIRequestFactory()
+
+    def invalid():
+        request = factory.post("/users", {"name": "too long"}, format="json", HTTP_X_INERTIA=True)
+        request.session = SessionStore()
+        return request
+
+    return {
+        "html": lambda: factory.get("/users", HTTP_ACCEPT="text/html"),
+        "json": lambda: factory.get("/users", HTTP_X_INERTIA=True),
+        "partial": lambda: factory.get(
+            "/users", HTTP_X_INERTIA=True,
+            HTTP_X_INERTIA_PARTIAL_DATA="title", HTTP_X_INERTIA_PARTIAL_COMPONENT="Users/List"),
+        "conflict": lambda: factory.get("/users", HTTP_X_INERTIA=True, HTTP_X_INERTIA_VERSION="stale"),
+        "invalid": invalid,
+    }
+
+
+def call(view, make_request):
+    response = view(make_request())
+    if hasattr(response, "render"):
+        response.render()
+    return response
+
+
+def main():
+    setup_django()
+
+    from django.test.utils import override_settings
+
+    with override_settings(TEMPLATES=TEMPLATES, CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}):
+        requests = make_requests()
+        for size, (count, number) in SIZES.items():
+            views = make_views({"title": "Users", "users": rows(count)})
+            results = []
+            for view_name, view in views.items():
+                for request_name, make_request in requests.items():
+                    if view_name == "middleware" and request_name != "conflict":
+                        continue
+                    results.append(("%s %s" % (view_name, request_name), bench(
+                        lambda: call(view, make_request), number=number)))
+            report("Request cycle, %s payload (%d rows)" % (size, count), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def setup_django():
+    """
+    Configures django with the same settings used by the test suite
+    """
+    from django.conf import settings
+    if not settings.configured:
+        from tests.conftest import pytest_configure
+        pytest_configure()
+
+
+def bench(func, number=10000, repeat=5):
+    """
+    Returns the best time per call of func in microseconds
+    """
+    timer = timeit.Timer(func)
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+# every reported result by title, saved by python -m benchmarks --save
+RESULTS = {}
+
+# results loaded by python -m benchmarks --compare
+BASELINE = {}
+
+
+def report(title, results):
+    """
+    Prints the results, with the change from the BASELINE
+    results of the same title
+    """
+    RESULTS[title] = dict(results)
+    previous = BASELINE.get(title, {})
+
+    print(title)
+    width = max(len(name) for name, _ in results)
+    for name, usec in results:
+        line = "  {0:<{1}}  {2:>10.2f} us".format(name, width, usec)
+        if previous.get(name):
+            line += "  {0:>+7.1%}".format(usec / previous[name] - 1)
+        print(line)
+
+
+def get_environment():
+    """
+    Describes where the results were measured so saved results
+    from different commits can be compared
+    """
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    import django
+    import rest_framework
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "rest_framework": rest_framework.VERSION,
+    }
+
+
+def save_results(path):
+    with open(path, "w") as f:
+        json.dump({"environment": get_environment(), "results": RESULTS}, f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
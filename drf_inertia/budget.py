@@ -0,0 +1,105 @@
+import logging
+import uuid
+
+from .encoders import encode
+from .exceptions import PayloadBudgetExceeded
+
+
+logger = logging.getLogger("drf_inertia.budget")
+
+# the number of largest props listed when a budget is exceeded
+TOP_PROPS = 5
+
+
+# stands in for the props while the rest of the page is encoded
+PROPS_MARKER = "drf_inertia:props:%s" % uuid.uuid4().hex
+
+
+def get_separators():
+    """
+    Returns the (item, key) separators of the JSON backend,
+    e.g. (b",", b":") for compact JSON
+    """
+    probe = encode({"a": 0, "b": 0})
+    value = probe.index(b"0")
+    return probe[value + 1:probe.index(b'"b"')], probe[len(b'{"a"'):value]
+
+
+def encode_page(page):
+    """
+    Encodes the page object one prop at a time, returning the
+    encoded page and the encoded size of each prop
+    """
+    props = {str(name): encode(value) for name, value in page["props"].items()}
+    item_separator, key_separator = get_separators()
+    body = b"".join((
+        b"{",
+        item_separator.join(encode(name) + key_separator + value for name, value in props.items()),
+        b"}",
+    ))
+    content = encode(dict(page, props=PROPS_MARKER)).replace(encode(PROPS_MARKER), body, 1)
+    return content, {name: len(value) for name, value in props.items()}
+
+
+class PayloadReport(object):
+    """
+    The size of an encoded page and of each of its props
+    """
+    def __init__(self, total, sizes, exceeded):
+        self.total = total
+        self.sizes = sizes
+        self.exceeded = exceeded  # the props (or "total") over budget
+
+    def largest(self, count=TOP_PROPS):
+        """
+        Returns the count largest (name, size) props
+        """
+        return sorted(self.sizes.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+class PayloadBudget(object):
+    """
+    Measures the size of inertia pages as they are encoded and reports
+    pages or props that are larger than their budget
+    """
+    def __init__(self, total=None, prop=None, raise_exception=False, callback=None):
+        self.total = total
+        self.prop = prop
+        self.raise_exception = raise_exception
+        self.callback = callback
+
+    def is_active(self):
+        return self.total is not None or self.prop is not None or self.callback is not None
+
+    def get_prop_budget(self, name):
+        if isinstance(self.prop, dict):
+            return self.prop.get(name)
+        return self.prop
+
+    def get_report(self, content, sizes):
+        exceeded = [name for name, size in sizes.items()
+                    if self.get_prop_budget(name) is not None and size > self.get_prop_budget(name)]
+        if self.total is not None and len(content) > self.total:
+            exceeded.insert(0, "total")
+
+        return PayloadReport(len(content), sizes, exceeded)
+
+    def measure(self, request, page):
+        """
+        Returns the encoded page after checking it against the budgets
+        """
+        content, sizes = encode_page(page)
+        report = self.get_report(content, sizes)
+
+        if self.callback is not None:
+            self.callback(request, report)
+
+        if report.exceeded:
+            message = "%s %s is over its payload budget (%s): %d bytes, largest props: %s" % (
+                request.method, request.path, ", ".join(report.exceeded), report.total,
+                ", ".join("%s (%d)" % item for item in report.largest()))
+            if self.raise_exception:
+                raise PayloadBudgetExceeded(message)
+            logger.warning(message, extra={"inertia_payload": report})
+
+        return content
@@ -0,0 +1,71 @@
+import uuid
+
+from django.core.cache import caches
+
+from .config import CACHE
+
+
+KEY_PREFIX = 'drf_inertia'
+
+
+def get_cache():
+    return caches[CACHE]
+
+
+def make_key(*parts):
+    return ':'.join((KEY_PREFIX,) + tuple(str(part) for part in parts))
+
+
+def get_scope(request):
+    """
+    Returns the scope values cached for the request are shared within: the
+    user, or the session for anonymous users. None if there is neither
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return "user:%s" % user.pk
+
+    session = getattr(request, "session", None)
+    session_key = getattr(session, "session_key", None)
+    if session_key:
+        return "session:%s" % session_key
+
+    return None
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def get_versions(keys, cached=None):
+    """
+    Returns the current version token for each of the version keys.
+
+    Version tokens are used to invalidate groups of cached values at once:
+    values are stored with the version they were computed at and are stale
+    once the version changes. Missing versions (never set or evicted) are
+    created, which makes any values stored before stale.
+
+    cached can be a dict of values already fetched from the cache
+    """
+    cache = get_cache()
+    if cached is None:
+        cached = cache.get_many(keys)
+
+    versions = {}
+    for key in keys:
+        version = cached.get(key)
+        if version is None:
+            cache.add(key, new_version(), None)
+            version = cache.get(key)
+        versions[key] = version
+
+    return versions
+
+
+def bump_versions(keys):
+    """
+    Changes the version tokens, invalidating every value stored
+    with the previous versions
+    """
+    get_cache().set_many({key: new_version() for key in keys}, None)
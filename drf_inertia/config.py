@@ -1,9 +1,24 @@
+import hashlib
+import os
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
 
 
-# the version to use for ASSET VERSIONING
+# the version to use for ASSET VERSIONING. This can also be a callable
+# returning the version or the path to a build manifest (a file ending in
+# .json, e.g. vite's manifest.json) whose hash is used as the version
 VERSION = getattr(settings, "INERTIA_VERSION", "unversioned")
 
+# the minimum number of seconds between calls to a callable INERTIA_VERSION
+# or checks for changes to the INERTIA_VERSION manifest
+VERSION_CHECK_INTERVAL = getattr(settings, "INERTIA_VERSION_CHECK_INTERVAL", 5)
+
 # the HTML template for interia requests (can be overridden by the @intertia decorator)
 TEMPLATE = getattr(settings, 'INERTIA_HTML_TEMPLATE', 'index.html')
 
@@ -12,11 +27,48 @@ TEMPLATE_VAR = getattr(settings, 'INERTIA_TEMPLATE_VAR', 'inertia_json')
 
 SHARED_DATA_SERIALIZER = getattr(settings, 'INERTIA_SHARED_SERIALIZER', 'drf_inertia.serializers.DefaultSharedSerializer')
 
+# The JSONEncoder used to encode the page object into the HTML template
+JSON_ENCODER = getattr(settings, 'INERTIA_JSON_ENCODER', 'rest_framework.utils.encoders.JSONEncoder')
+
+# The backend used to encode page objects to JSON: "json", "orjson", "ujson"
+# or the dotted path to a drf_inertia.encoders.JSONBackend subclass. Falls
+# back to "json" if the library for the backend is not installed
+JSON_BACKEND = getattr(settings, 'INERTIA_JSON_BACKEND', 'json')
+
+JSON_BACKENDS = {
+    'json': 'drf_inertia.encoders.JSONBackend',
+    'orjson': 'drf_inertia.encoders.OrjsonBackend',
+    'ujson': 'drf_inertia.encoders.UjsonBackend',
+}
+
+# The django cache alias used by drf_inertia
+CACHE = getattr(settings, 'INERTIA_CACHE', 'default')
+
+# The default number of seconds CachedSharedFields are cached for
+SHARED_CACHE_TIMEOUT = getattr(settings, 'INERTIA_SHARED_CACHE_TIMEOUT', 300)
+
+# The maximum number of threads used to resolve concurrent
+# props and shared fields
+PROP_THREADS = getattr(settings, 'INERTIA_PROP_THREADS', 4)
+
+# Add ETags to inertia JSON responses and answer matching
+# If-None-Match requests with 304 Not Modified
+ETAG = getattr(settings, 'INERTIA_ETAG', True)
+
+# Compress streamed inertia JSON responses (those with StreamProps) with
+# gzip, or brotli when it is installed and accepted by the client
+STREAM_COMPRESSION = getattr(settings, 'INERTIA_STREAM_COMPRESSION', False)
+
 # The exception handler for inertia requests
 # ensures that exceptions are returned in interia
 # format
 EXCEPTION_HANDLER = getattr(settings, 'INERTIA_EXCEPTION_HANDLER', 'drf_inertia.exceptions.DefaultExceptionHandler')
 
+# A cookie set alongside errors stored in the session by the exception
+# handler. Without it the session is not loaded just to look for errors.
+# Set to None to always look for errors in the session
+ERRORS_COOKIE = getattr(settings, 'INERTIA_ERRORS_COOKIE', 'inertia_errors')
+
 # The auth redirect is used in the default exception handler
 # to determine where to go when 401 or 403 errors are raised
 AUTH_REDIRECT = getattr(settings, 'INERTIA_AUTH_REDIRECT', '/login')
@@ -27,3 +79,255 @@ AUTH_REDIRECT_URL_NAME = getattr(settings, 'INERTIA_AUTH_REDIRECT_URL_NAME', Non
 
 # DEBUG
 DEBUG = settings.DEBUG
+
+# Record how long each stage of inertia requests takes and add
+# them to the response as a Server-Timing header
+TIMING = getattr(settings, 'INERTIA_TIMING', DEBUG)
+
+# The class that records the timings of each request. Subclass
+# drf_inertia.timing.TimingCollector to send them to your metrics
+TIMING_COLLECTOR = getattr(settings, 'INERTIA_TIMING_COLLECTOR', 'drf_inertia.timing.TimingCollector')
+
+# Count the queries run by each lazy prop and shared field, reporting
+# them in an X-Inertia-Queries header and logging repeated queries (N+1)
+QUERY_CHECK = getattr(settings, 'INERTIA_QUERY_CHECK', DEBUG)
+
+# The maximum number of queries a lazy prop or shared field may run before
+# QueryThresholdExceeded is raised (e.g. to fail tests). None for no limit
+QUERY_THRESHOLD = getattr(settings, 'INERTIA_QUERY_THRESHOLD', None)
+
+# The maximum size in bytes of the encoded page object (None for no limit)
+PAYLOAD_BUDGET = getattr(settings, 'INERTIA_PAYLOAD_BUDGET', None)
+
+# The maximum size in bytes of each encoded prop, or a dict of
+# prop names to their maximum sizes (None for no limit)
+PROP_BUDGET = getattr(settings, 'INERTIA_PROP_BUDGET', None)
+
+# Raise PayloadBudgetExceeded instead of logging a warning (e.g. in tests)
+PAYLOAD_BUDGET_RAISE = getattr(settings, 'INERTIA_PAYLOAD_BUDGET_RAISE', False)
+
+# Called with the request and the PayloadReport of every measured
+# page e.g. to send the sizes to your metrics
+PAYLOAD_CALLBACK = getattr(settings, 'INERTIA_PAYLOAD_CALLBACK', None)
+
+# Server-side render first visits with the inertia SSR server, falling
+# back to client-side rendering if it fails or times out
+SSR_ENABLED = getattr(settings, 'INERTIA_SSR_ENABLED', False)
+
+# The url of the SSR server, "http://host:port" or "unix:///path/to/socket"
+SSR_URL = getattr(settings, 'INERTIA_SSR_URL', 'http://127.0.0.1:13714')
+
+# The number of seconds to wait for the SSR server
+SSR_TIMEOUT = getattr(settings, 'INERTIA_SSR_TIMEOUT', 1)
+
+# The number of rendered pages kept in memory (0 to disable)
+SSR_CACHE_SIZE = getattr(settings, 'INERTIA_SSR_CACHE_SIZE', 128)
+
+# The client that sends pages to the SSR server (e.g. a stub in tests)
+SSR_CLIENT = getattr(settings, 'INERTIA_SSR_CLIENT', 'drf_inertia.ssr.HTTPSSRClient')
+
+# The number of seconds the responses to prefetch requests (Purpose: prefetch)
+# are cached for the visit that follows them (0, the default, to disable)
+PREFETCH_CACHE_TIMEOUT = getattr(settings, 'INERTIA_PREFETCH_CACHE_TIMEOUT', 0)
+
+
+# Classes resolved from the dotted paths in settings. They are imported
+# once and cached until an INERTIA_ setting changes
+_registry = {}
+
+
+def resolve(setting, default):
+    """
+    Returns the object at the dotted path given by the setting, importing
+    it the first time it is requested
+    """
+    try:
+        return _registry[setting]
+    except KeyError:
+        path = getattr(settings, setting, default)
+        component = import_string(path) if isinstance(path, str) else path
+        _registry[setting] = component
+        return component
+
+
+def get_shared_serializer_class():
+    return resolve('INERTIA_SHARED_SERIALIZER', SHARED_DATA_SERIALIZER)
+
+
+def get_json_encoder_class():
+    return resolve('INERTIA_JSON_ENCODER', JSON_ENCODER)
+
+
+def get_timing_collector_class():
+    """
+    Returns the INERTIA_TIMING_COLLECTOR class, or None if timing is disabled
+    """
+    try:
+        return _registry['INERTIA_TIMING:collector']
+    except KeyError:
+        collector_class = None
+        if getattr(settings, 'INERTIA_TIMING', TIMING):
+            collector_class = resolve('INERTIA_TIMING_COLLECTOR', TIMING_COLLECTOR)
+        _registry['INERTIA_TIMING:collector'] = collector_class
+        return collector_class
+
+
+def get_payload_budget():
+    """
+    Returns the PayloadBudget for the budget settings, or None if
+    there are no budgets (or callback) and pages are not measured
+    """
+    try:
+        return _registry['INERTIA_PAYLOAD_BUDGET:instance']
+    except KeyError:
+        budget = import_string('drf_inertia.budget.PayloadBudget')(
+            total=getattr(settings, 'INERTIA_PAYLOAD_BUDGET', PAYLOAD_BUDGET),
+            prop=getattr(settings, 'INERTIA_PROP_BUDGET', PROP_BUDGET),
+            raise_exception=getattr(settings, 'INERTIA_PAYLOAD_BUDGET_RAISE', PAYLOAD_BUDGET_RAISE),
+            callback=resolve('INERTIA_PAYLOAD_CALLBACK', PAYLOAD_CALLBACK))
+        if not budget.is_active():
+            budget = None
+
+        _registry['INERTIA_PAYLOAD_BUDGET:instance'] = budget
+        return budget
+
+
+def get_ssr_renderer():
+    """
+    Returns the singleton SSRRenderer, or None if SSR is disabled
+    """
+    try:
+        return _registry['INERTIA_SSR:instance']
+    except KeyError:
+        renderer = None
+        if getattr(settings, 'INERTIA_SSR_ENABLED', SSR_ENABLED):
+            client_class = resolve('INERTIA_SSR_CLIENT', SSR_CLIENT)
+            client = client_class(getattr(settings, 'INERTIA_SSR_URL', SSR_URL),
+                                  getattr(settings, 'INERTIA_SSR_TIMEOUT', SSR_TIMEOUT))
+            renderer = import_string('drf_inertia.ssr.SSRRenderer')(
+                client, getattr(settings, 'INERTIA_SSR_CACHE_SIZE', SSR_CACHE_SIZE))
+
+        _registry['INERTIA_SSR:instance'] = renderer
+        return renderer
+
+
+def get_json_backend():
+    """
+    Returns the singleton instance of the INERTIA_JSON_BACKEND
+    """
+    try:
+        return _registry['INERTIA_JSON_BACKEND:instance']
+    except KeyError:
+        name = getattr(settings, 'INERTIA_JSON_BACKEND', JSON_BACKEND)
+        backend_class = import_string(JSON_BACKENDS.get(name, name))
+        if not backend_class.available:
+            warnings.warn("INERTIA_JSON_BACKEND %r is not installed, falling back to json" % name)
+            backend_class = import_string(JSON_BACKENDS['json'])
+
+        backend = backend_class()
+        _registry['INERTIA_JSON_BACKEND:instance'] = backend
+        return backend
+
+
+class AssetVersion(object):
+    """
+    Resolves the asset version from the INERTIA_VERSION setting.
+
+    Static versions are returned as they are. Callables are called, and
+    manifests are hashed, at most once every check_interval seconds: a
+    manifest is only hashed again when its modification time changes
+    """
+    def __init__(self, version, check_interval):
+        self.source = version
+        self.check_interval = check_interval
+        self.checked_at = None
+        self.mtime = None
+        self.value = None
+
+        self.is_manifest = isinstance(version, str) and version.endswith('.json')
+        self.is_dynamic = self.is_manifest or callable(version)
+        if not self.is_dynamic:
+            self.value = version
+
+    def get(self):
+        if not self.is_dynamic:
+            return self.value
+
+        now = time.monotonic()
+        if self.checked_at is not None and now - self.checked_at < self.check_interval:
+            return self.value
+
+        self.checked_at = now
+        if self.is_manifest:
+            self.value = self.get_manifest_hash()
+        else:
+            self.value = str(self.source())
+
+        return self.value
+
+    def get_manifest_hash(self):
+        try:
+            mtime = os.stat(self.source).st_mtime_ns
+            if mtime != self.mtime:
+                with open(self.source, 'rb') as manifest:
+                    self.value = hashlib.md5(manifest.read()).hexdigest()
+                self.mtime = mtime
+        except OSError:
+            # e.g. the manifest is not built yet
+            self.mtime = None
+            return "unversioned"
+
+        return self.value
+
+
+def get_version():
+    """
+    Returns the current asset version
+    """
+    try:
+        asset_version = _registry['INERTIA_VERSION:instance']
+    except KeyError:
+        asset_version = AssetVersion(
+            getattr(settings, 'INERTIA_VERSION', VERSION),
+            getattr(settings, 'INERTIA_VERSION_CHECK_INTERVAL', VERSION_CHECK_INTERVAL))
+        _registry['INERTIA_VERSION:instance'] = asset_version
+
+    return asset_version.get()
+
+
+def get_executor():
+    """
+    Returns the thread pool used to resolve concurrent props
+    """
+    try:
+        return _registry['INERTIA_PROP_THREADS:executor']
+    except KeyError:
+        executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'INERTIA_PROP_THREADS', PROP_THREADS),
+            thread_name_prefix='drf_inertia')
+        _registry['INERTIA_PROP_THREADS:executor'] = executor
+        return executor
+
+
+def get_exception_handler():
+    """
+    Returns the singleton instance of the INERTIA_EXCEPTION_HANDLER
+    """
+    try:
+        return _registry['INERTIA_EXCEPTION_HANDLER:instance']
+    except KeyError:
+        handler = resolve('INERTIA_EXCEPTION_HANDLER', EXCEPTION_HANDLER)()
+        _registry['INERTIA_EXCEPTION_HANDLER:instance'] = handler
+        return handler
+
+
+@receiver(setting_changed)
+def clear_registry(setting, **kwargs):
+    if setting.startswith('INERTIA_'):
+        executor = _registry.get('INERTIA_PROP_THREADS:executor')
+        if executor is not None:
+            executor.shutdown(wait=False)
+        ssr = _registry.get('INERTIA_SSR:instance')
+        if ssr is not None:
+            ssr.close()
+        _registry.clear()
@@ -1,11 +1,18 @@
-from functools import wraps
+from types import MappingProxyType
 
-from .negotiation import Inertia, InertiaNegotiation
+from asgiref.sync import sync_to_async
+
+from .negotiation import Inertia, InertiaNegotiation, aresolve_response_props, resolve_response_props
 from .exceptions import exception_handler
 from .config import TEMPLATE, DEBUG
+from .page_cache import cache_pages
+from .prefetch import check_prefetched, update_prefetched
+from .queries import create_query_counter
+from .streaming import stream_response
+from .timing import create_timing, get_timing, measure
 
 
-def inertia(component_path, template_name=None, **component_kwargs):
+def inertia(component_path, template_name=None, cache_timeout=None, cache_tags=(), **component_kwargs):
     """
     Decorator to apply to rest_framework views and viewsets to convert the
     request into an interia request / response
@@ -17,6 +24,11 @@ def inertia(component_path, template_name=None, **component_kwargs):
                              methods.
     template_name (string):  Optional. override the default template used when
                              returning HTML
+    cache_timeout (int):     Optional. Cache the full page HTML responses for
+                             anonymous visitors for this many seconds. Cached
+                             pages are served without running the view
+    cache_tags (list):       Optional. Tags for the cached pages, used to
+                             invalidate them with page_cache.invalidate_pages
     **component_kwargs:      Any kwargs passed are used to map class based view
                              methods or viewset view methods to components e.g.
                              retrieve="Users/Detail" would ensure that the component
@@ -27,23 +39,41 @@ def inertia(component_path, template_name=None, **component_kwargs):
         # otherwise just need to decorate the target
         cls = getattr(target, "cls", target)
 
+        # resolve the component for every action once per view class
+        # (subclasses can mark their own methods with @component), so
+        # each request only needs a single lookup
+        components_by_class = {cls: get_components(cls, component_kwargs)}
+
         # need to keep the original initial method because we are
         # not extending cls, we are replacing the methods, so calling
         # super will not work as expected
         wrapped_initial = getattr(cls, "initial")
 
         def initial(self, request, *args, **kwargs):
+            timing = get_timing(request) or create_timing()
+            if timing is not None:
+                timing.start("initial")
+
             # Configure Inertia object and add to request
             if not hasattr(request, 'inertia'):
                 # Get the action (~http method) to determine the component.
                 # ViewSets set the "action" attribute on the instance,
                 # class based views just use the HTTP method
                 action = getattr(self, "action", request.method)
-                cp = component_kwargs.get(action, component_path)
-
-                request.inertia = Inertia.from_request(request, cp)
+                view_class = type(self)
+                components = components_by_class.get(view_class)
+                if components is None:
+                    components = components_by_class[view_class] = get_components(view_class, component_kwargs)
+                cp = components.get(action, component_path)
+
+                with measure(timing, "inertia"):
+                    request.inertia = Inertia.from_request(request, cp)
                 self.inertia = request.inertia  # add to view as convenience
 
+            request.inertia.timing = timing
+            if request.inertia.queries is None:
+                request.inertia.queries = create_query_counter()
+
             # Asset Versioning:
             #
             # must do this after inertia has been added to the request
@@ -59,6 +89,14 @@ def inertia(component_path, template_name=None, **component_kwargs):
             # call the wrapped initial method
             wrapped_initial(self, request, *args, **kwargs)
 
+            # serve the page from the cache if the user just prefetched it,
+            # after authentication, permissions and throttling
+            check_prefetched(request)
+
+            if timing is not None:
+                timing.stop("initial")
+                timing.start("view")
+
         def raise_uncaught_exception(self, exc):
             if DEBUG:
                 request = self.request
@@ -66,11 +104,45 @@ def inertia(component_path, template_name=None, **component_kwargs):
                 request.accepted_media_type = "text/html"
             raise exc
 
+        wrapped_finalize_response = getattr(cls, "finalize_response")
+
+        def finalize_response(self, request, response, *args, **kwargs):
+            timing = get_timing(request)
+            if timing is not None:
+                timing.stop("view")
+
+            response = wrapped_finalize_response(self, request, response, *args, **kwargs)
+            response = update_prefetched(request, response)
+
+            # responses with stream props are streamed and the props of
+            # other renderers are resolved (async views do both after
+            # their awaitable props are resolved)
+            if not getattr(self, "view_is_async", False):
+                response = resolve_response_props(request, response)
+                response = stream_response(request, response)
+            return response
+
         # add the updated methods to the cls
         cls.get_content_negotiator = lambda self: InertiaNegotiation()
         cls.get_exception_handler = lambda self: exception_handler
         cls.initial = initial
         cls.raise_uncaught_exception = raise_uncaught_exception
+        cls.finalize_response = finalize_response
+
+        # async views (e.g. adrf) resolve lazy props in the event loop
+        # so awaitable props can run concurrently
+        wrapped_async_dispatch = getattr(cls, "async_dispatch", None)
+        if wrapped_async_dispatch is not None:
+            async def async_dispatch(self, request, *args, **kwargs):
+                response = await wrapped_async_dispatch(self, request, *args, **kwargs)
+                response = await aresolve_response_props(self.request, response)
+                return await sync_to_async(stream_response)(self.request, response)
+
+            cls.async_dispatch = async_dispatch
+
+        if cache_timeout:
+            cls.dispatch = cache_pages(cls.dispatch, component_path, cache_timeout, cache_tags)
+
         return target
     return decorator
 
@@ -108,11 +180,35 @@ def component(component_path):
     ```
     """
     def method_decorator(method):
-        @wraps(method)
-        def wrapper(*args, **kwargs):
-            # update the request inertia object if it exists
-            if args[1] and hasattr(args[1], "inertia"):
-                args[1].inertia.component = component_path
-            return method(*args, **kwargs)
-        return wrapper
+        # mark the method, the @inertia decorator on the class
+        # collects the marked methods when it is applied
+        method.inertia_component = component_path
+        return method
     return method_decorator
+
+
+def get_components(cls, component_kwargs):
+    """
+    Returns an immutable map of view actions to components from the
+    @inertia kwargs and the methods of cls marked with @component.
+
+    Class based views use the HTTP method as the action so methods
+    are mapped by both their name and their upper case name
+    """
+    # the most derived definition of each method wins
+    markers = {}
+    for klass in reversed(cls.__mro__):
+        for name, method in vars(klass).items():
+            markers[name] = getattr(method, "inertia_component", None)
+
+    components = dict(component_kwargs)
+    http_method_names = getattr(cls, "http_method_names", [])
+    for name, component_path in markers.items():
+        if component_path is None:
+            continue
+
+        components[name] = component_path
+        if name in http_method_names:
+            components[name.upper()] = component_path
+
+    return MappingProxyType(components)
@@ -0,0 +1,158 @@
+import json
+import math
+from decimal import Decimal
+
+from rest_framework.compat import LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+from .config import get_json_backend, get_json_encoder_class
+
+# orjson and ujson are optional
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def has_non_finite(data):
+    """
+    Checks if the data contains NaN or infinite floats (or decimals)
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, Decimal) and not value.is_finite():
+            return True
+    return False
+
+
+class JSONBackend(object):
+    """
+    Encodes page objects with the standard library json module
+    and the INERTIA_JSON_ENCODER.
+
+    Like rest framework's JSONRenderer the JSON is compact (COMPACT_JSON),
+    unicode (UNICODE_JSON) and NaN or infinite floats raise a ValueError
+    (STRICT_JSON) as set in the REST_FRAMEWORK settings.
+
+    Other backends convert types that they cannot encode natively
+    with the INERTIA_JSON_ENCODER so they produce the same JSON.
+    """
+    available = True
+
+    def __init__(self):
+        self.encoder_class = get_json_encoder_class()
+
+    def dumps(self, data):
+        """
+        Returns the data as a JSON string
+        """
+        ret = json.dumps(
+            data, cls=self.encoder_class, ensure_ascii=not api_settings.UNICODE_JSON,
+            allow_nan=not api_settings.STRICT_JSON,
+            separators=SHORT_SEPARATORS if api_settings.COMPACT_JSON else LONG_SEPARATORS)
+
+        # escape \u2028 and \u2029 so the JSON is a strict javascript subset
+        return ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+
+    def encode(self, data):
+        """
+        Returns the data as utf-8 encoded JSON
+        """
+        return self.dumps(data).encode()
+
+
+class OrjsonBackend(JSONBackend):
+    available = orjson is not None
+
+    def __init__(self):
+        super(OrjsonBackend, self).__init__()
+        self.default = self.encoder_class().default
+
+        if orjson is None:
+            self.option = 0
+        elif self.encoder_class is encoders.JSONEncoder:
+            # orjson formats datetimes the same way as rest framework
+            # once UTC is serialized as Z
+            self.option = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+        else:
+            # let the custom encoder format datetimes
+            self.option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def fallback(self, data):
+        # encode with the json module, JSONBackend.encode would call dumps
+        return JSONBackend.dumps(self, data).encode()
+
+    def encode(self, data):
+        if not api_settings.UNICODE_JSON or not api_settings.COMPACT_JSON:
+            # orjson only writes compact unicode JSON
+            return self.fallback(data)
+
+        try:
+            ret = orjson.dumps(data, default=self.default, option=self.option)
+        except orjson.JSONEncodeError:
+            # e.g. integers larger than 64 bits
+            return self.fallback(data)
+
+        if b"null" in ret and has_non_finite(data):
+            # orjson writes NaN and infinite floats as null, the json
+            # backend raises (STRICT_JSON) or writes them as NaN
+            return self.fallback(data)
+
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+    def dumps(self, data):
+        return self.encode(data).decode()
+
+
+class UjsonBackend(JSONBackend):
+    available = ujson is not None
+
+    def __init__(self):
+        super(UjsonBackend, self).__init__()
+        self.default = self.encoder_class().default
+
+    def dumps(self, data):
+        if not api_settings.COMPACT_JSON:
+            # ujson only writes compact JSON
+            return super(UjsonBackend, self).dumps(data)
+
+        try:
+            ret = ujson.dumps(
+                data, default=self.default, ensure_ascii=not api_settings.UNICODE_JSON,
+                allow_nan=not api_settings.STRICT_JSON, escape_forward_slashes=False)
+        except OverflowError:
+            # integers larger than 64 bits, or NaN and infinite floats
+            # with STRICT_JSON, which the json backend raises for
+            return super(UjsonBackend, self).dumps(data)
+
+        return ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+
+
+def dumps(data):
+    """
+    Encodes the page object into a JSON string with the
+    INERTIA_JSON_BACKEND
+    """
+    return get_json_backend().dumps(data)
+
+
+def encode(data):
+    """
+    Encodes the page object into utf-8 JSON with the
+    INERTIA_JSON_BACKEND
+    """
+    return get_json_backend().encode(data)
@@ -1,9 +1,9 @@
 from django.urls import reverse
-from django.utils.module_loading import import_string
 from rest_framework import status, views
+from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError, APIException, PermissionDenied, NotAuthenticated
 
-from .config import EXCEPTION_HANDLER, AUTH_REDIRECT, AUTH_REDIRECT_URL_NAME
+from .config import AUTH_REDIRECT, AUTH_REDIRECT_URL_NAME, ERRORS_COOKIE, get_exception_handler
 
 
 class Conflict(APIException):
@@ -16,6 +16,40 @@ class Conflict(APIException):
         super().__init__(detail, code)
 
 
+class NotModified(APIException):
+    status_code = status.HTTP_304_NOT_MODIFIED
+    default_detail = 'Not modified.'
+    default_code = 'not_modified'
+
+    def __init__(self, etag, detail=None, code=None):
+        self.etag = etag
+        super().__init__(detail, code)
+
+
+class Prefetched(APIException):
+    status_code = status.HTTP_200_OK
+    default_detail = 'Prefetched.'
+    default_code = 'prefetched'
+
+    def __init__(self, response, detail=None, code=None):
+        self.response = response  # the cached response to the prefetch request
+        super().__init__(detail, code)
+
+
+class QueryThresholdExceeded(Exception):
+    """
+    Raised when a lazy prop or shared field runs more
+    than INERTIA_QUERY_THRESHOLD queries
+    """
+
+
+class PayloadBudgetExceeded(Exception):
+    """
+    Raised when a page is over INERTIA_PAYLOAD_BUDGET or a prop is over
+    INERTIA_PROP_BUDGET and INERTIA_PAYLOAD_BUDGET_RAISE is set
+    """
+
+
 class DefaultExceptionHandler(object):
 
     def get_redirect_status(self, request):
@@ -59,8 +93,11 @@ class DefaultExceptionHandler(object):
         if override_status:
             response.status_code = override_status
             if response.data:
-                # add the errors to the users session
+                # add the errors to the users session and flag
+                # that there are errors to be read on the next request
                 request.session["errors"] = response.data
+                if ERRORS_COOKIE:
+                    response.set_cookie(ERRORS_COOKIE, "1", httponly=True, samesite="Lax")
 
         if is_inertia and response.status_code == status.HTTP_409_CONFLICT:
             response['X-Inertia-Location'] = request.path
@@ -72,8 +109,17 @@ class DefaultExceptionHandler(object):
 
 
 def exception_handler(exc, context):
-    handler = import_string(EXCEPTION_HANDLER)
-    return handler().handle(exc, context)
+    # these are responses rather than errors, so they are returned
+    # whatever the INERTIA_EXCEPTION_HANDLER
+    if isinstance(exc, NotModified):
+        # the page has not changed since the client last saw it
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": exc.etag})
+
+    if isinstance(exc, Prefetched):
+        # the page was prefetched by the same user moments ago
+        return exc.response
+
+    return get_exception_handler().handle(exc, context)
 
 
 def set_error_redirect(request, error_redirect):
@@ -0,0 +1,44 @@
+from django.http import HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework import status
+
+from .config import get_version
+
+
+def is_stale_visit(request):
+    """
+    Checks if the request is an inertia GET visit from a frontend
+    built with a different asset version
+    """
+    meta = request.META
+    version = meta.get('HTTP_X_INERTIA_VERSION', None)
+    return (request.method == "GET"
+            and bool(meta.get('HTTP_X_INERTIA', False))
+            and version is not None
+            and version != get_version())
+
+
+class InertiaVersionMiddleware(MiddlewareMixin):
+    """
+    Answers inertia visits with a stale asset version with a bodiless 409
+    before authentication, throttling, the view and the serializers run,
+    so the frontend reloads the page (a full visit) straight away:
+    ```
+        MIDDLEWARE = [
+            "django.middleware.security.SecurityMiddleware",
+            "drf_inertia.middleware.InertiaVersionMiddleware",
+            # ...
+        ]
+    ```
+
+    Views decorated with @inertia still check the version, e.g. for
+    requests other than GET or when the middleware is not installed
+    """
+    def process_request(self, request):
+        if not is_stale_visit(request):
+            return None
+
+        # see https://inertiajs.com/the-protocol#asset-versioning
+        response = HttpResponse(status=status.HTTP_409_CONFLICT)
+        response["X-Inertia-Location"] = request.get_full_path()
+        return response
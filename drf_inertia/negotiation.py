@@ -1,11 +1,21 @@
-import json
+import hashlib
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 from rest_framework import status
 from rest_framework.renderers import TemplateHTMLRenderer, JSONRenderer
 from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.response import Response
 
-from .config import VERSION, TEMPLATE_VAR
-from .serializers import InertiaSerializer
-from .exceptions import Conflict
+from .config import TEMPLATE_VAR, DEBUG, ERRORS_COOKIE, ETAG, get_version, get_payload_budget, get_ssr_renderer
+from .encoders import dumps, encode
+from .props import DeferredProp, LazyProp, MergeProp, resolve_props, aresolve_props
+from .serializers import get_page, has_messages, session_has_key
+from .timing import get_timing, measure
+from .exceptions import Conflict, NotModified
 
 
 REDIRECTS = [
@@ -15,40 +25,158 @@ REDIRECTS = [
 ]
 
 
+def is_page_response(response):
+    # the response holds a page object (not a redirect or 304)
+    return (response is not None
+            and response.status_code not in REDIRECTS
+            and response.status_code != status.HTTP_304_NOT_MODIFIED)
+
+
 def is_valid_inertia_response(status_code):
     return status_code == status.HTTP_409_CONFLICT or status_code < 300
 
 
 class Inertia(object):
-    is_data = False  # is the X-Inertia header present
-    version = None
-    component = None
-    partial_data = None
-    url = None
-    data = {}
-    _error_redirect = None
-
-    def __init__(self, **kwargs):
-        for k in kwargs:
-            if hasattr(self, k):
-                setattr(self, k, kwargs[k])
+    """
+    The inertia details of a request, added to the request
+    (and view) as request.inertia by the @inertia decorator
+    """
+    __slots__ = ('is_data', 'version', 'component', 'url', 'data', 'etag', 'timing', 'queries',
+                 'deferred', 'merged', 'reset', 'prefetch', 'resolved', '_partial_data',
+                 '_partial_props', '_error_redirect')
+
+    def __init__(self, is_data=False, version=None, component=None,
+                 partial_data=None, url=None, data=None, reset=None, prefetch=False):
+        self.is_data = is_data  # is the X-Inertia header present
+        self.prefetch = prefetch  # is this a prefetch request (Purpose: prefetch)
+        self.version = version
+        self.component = component
+        self.partial_data = partial_data
+        self.url = url
+        self.data = {} if data is None else data
+        self.etag = None
+        self.deferred = {}  # the names of the deferred props left out, by group
+        self.merged = {}  # the names of the merge props sent, and if they are deep merged
+        self.reset = frozenset(reset or ())  # merge props the frontend should replace
+        self.timing = None  # the TimingCollector when INERTIA_TIMING is enabled
+        self.queries = None  # the QueryCounter when INERTIA_QUERY_CHECK is enabled
+        self.resolved = None  # the response data once its lazy props are resolved
+        self._error_redirect = None
+
+    @property
+    def partial_data(self):
+        return self._partial_data
+
+    @partial_data.setter
+    def partial_data(self, partial_data):
+        # the requested prop paths and their top-level props
+        # as sets so include() is a single lookup
+        if partial_data:
+            self._partial_data = frozenset(partial_data)
+            self._partial_props = frozenset(path.split(".", 1)[0] for path in partial_data)
+        else:
+            self._partial_data = None
+            self._partial_props = None
 
     def include(self, name):
-        if not self.partial_data:
+        if not self._partial_props:
             return True
 
-        return name in self.partial_data
+        # nested keys ("user.name") include their top-level prop
+        return name in self._partial_props
+
+    @staticmethod
+    def lazy(callback):
+        """
+        Returns a prop that is only resolved when a partial
+        reload explicitly asks for it
+        """
+        return LazyProp(callback, optional=True)
+
+    @staticmethod
+    def defer(callback, group="default"):
+        """
+        Returns a prop that is left out of the first response and
+        fetched by the frontend once the page has rendered
+        """
+        return DeferredProp(callback, group=group)
+
+    @staticmethod
+    def merge(value, deep=False):
+        """
+        Returns a prop that the frontend merges into its current value
+        """
+        return MergeProp(value, deep=deep)
 
     def __str__(self):
-        return str(self.__dict__)
+        return str({name: getattr(self, name, None) for name in self.__slots__})
 
     def check_version(self):
         # if this is an X-Inertia: true request, and the versions match
-        if self.is_data and self.version is not None and self.version != VERSION:
+        if self.is_data and self.version is not None and self.version != get_version():
             # this will trigger a refresh on the frontend
             # see https://inertiajs.com/the-protocol#asset-versioning
             raise Conflict()
 
+    def get_etag(self, content):
+        """
+        Returns a strong ETag for the page content, scoped by the
+        component, asset version and requested partial props
+        """
+        md5 = hashlib.md5()
+        for part in (self.component, get_version(), ",".join(sorted(self.partial_data or ()))):
+            md5.update(str(part).encode())
+            md5.update(b"|")
+        md5.update(content)
+        return '"%s"' % md5.hexdigest()
+
+    def check_not_modified(self, request, validator):
+        """
+        Lets a view skip building and rendering the page when a cheap
+        validator (e.g. the latest updated_at of the objects on the page)
+        shows the client already has it.
+
+        Raises NotModified (returned as a 304) if the client's If-None-Match
+        matches, otherwise the ETag for the validator is used for the
+        response. Pending flash messages or errors always render the page.
+        """
+        if not self.is_data or request.method not in ("GET", "HEAD"):
+            return
+
+        self.etag = self.get_etag(str(validator).encode())
+        if (etag_matches(request, self.etag)
+                and not has_messages(request)
+                and not session_has_key(request, "errors", ERRORS_COOKIE)):
+            raise NotModified(self.etag)
+
+    def add_deferred(self, name, group):
+        """
+        Records a deferred prop that was left out of the response
+        """
+        names = self.deferred.setdefault(group, [])
+        if name not in names:
+            names.append(name)
+
+    def add_merged(self, name, deep=False):
+        """
+        Records a merge prop that is being sent, unless the request resets it
+        """
+        if name not in self.reset:
+            self.merged[name] = deep
+
+    def resolve(self, props):
+        """
+        Returns props with their lazy props resolved. The props are only
+        resolved once, finalize_response resolves them to look for stream
+        props and the renderer uses the resolved props
+        """
+        if props is not None and props is self.resolved:
+            return props
+
+        with measure(self.timing, "props"):
+            self.resolved = resolve_props(props, self)
+        return self.resolved
+
     def set_error_redirect(self, path):
         self._error_redirect = path
 
@@ -57,58 +185,232 @@ class Inertia(object):
 
     @classmethod
     def from_request(cls, request, component):
-        inertia = Inertia()
-        inertia.is_data = request.META.get('HTTP_X_INERTIA', False)
-        inertia.component = component
-        inertia.url = request.path
-        inertia.version = request.META.get('HTTP_X_INERTIA_VERSION', None)
-
-        if inertia.is_data:
+        meta = request.META
+        is_data = meta.get('HTTP_X_INERTIA', False)
+        version = meta.get('HTTP_X_INERTIA_VERSION', None)
+        partial_data = None
+        reset = None
+        prefetch = False
+
+        if is_data:
             # if this is an X-Inertia: true request, check the version
-            if inertia.version is not None and inertia.version != VERSION:
+            if version is not None and version != get_version():
                 raise Conflict()
 
             # set partial details if they exist and are valid
-            partial_component = request.META.get('HTTP_X_INERTIA_PARTIAL_COMPONENT', None)
-            partial_data = request.META.get('HTTP_X_INERTIA_PARTIAL_DATA', None)
-            if partial_data and partial_component == component:
-                inertia.partial_data = [s.strip() for s in partial_data.split(',')]
+            partial_header = meta.get('HTTP_X_INERTIA_PARTIAL_DATA', None)
+            if partial_header and meta.get('HTTP_X_INERTIA_PARTIAL_COMPONENT', None) == component:
+                partial_data = [s.strip() for s in partial_header.split(',')]
+
+            # merge props the frontend should replace instead of merging
+            reset_header = meta.get('HTTP_X_INERTIA_RESET', None)
+            if reset_header:
+                reset = [s.strip() for s in reset_header.split(',')]
+
+            # links prefetched by the frontend before they are visited
+            prefetch = meta.get('HTTP_PURPOSE', None) == 'prefetch'
+
+        return cls(is_data=is_data, version=version, component=component,
+                   partial_data=partial_data, url=request.path, reset=reset, prefetch=prefetch)
+
 
-        return inertia
+def etag_matches(request, etag):
+    etags = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+    return "*" in etags or any((e[2:] if e.startswith("W/") else e) == etag for e in etags)
+
+
+def finish(request, response):
+    """
+    Reports the timings and queries of the request once the response is ready
+    """
+    inertia = getattr(request, "inertia", None)
+    if inertia is None:
+        return
+
+    if inertia.timing is not None:
+        inertia.timing.finish(request, response)
+    if inertia.queries is not None:
+        inertia.queries.finish(request, response)
 
 
 class InertiaRendererMixin(object):
+    # the name the rendering is timed as
+    timing_name = "render"
+
     def render(self, data, accepted_media_type=None, renderer_context=None):
-        # only add data to response if not a redirect
-        if renderer_context["response"] and renderer_context["response"].status_code not in REDIRECTS:
-            # add the data to the inertia object then serialize it
-            # with the InertiaSerializer
-            renderer_context["request"].inertia.data = data
-            serializer = InertiaSerializer(renderer_context["request"].inertia, context=renderer_context)
-            data = serializer.data
+        # only add data to response if not a redirect (or not modified)
+        request = renderer_context["request"]
+        response = renderer_context["response"]
+        timing = get_timing(request)
+        if is_page_response(response):
+            # resolve any lazy props, add the data to the inertia object
+            # then build the page object from it
+            # error data (e.g. {"detail": ...}) is sent as it is
+            inertia = request.inertia
+            inertia.data = inertia.resolve(data) if status.is_success(response.status_code) else data
+            with measure(timing, "page"):
+                data = get_page(inertia, renderer_context)
+
+            # measuring the page encodes it, the renderers use the
+            # encoded page instead of encoding it again
+            budget = get_payload_budget()
+            if budget is not None:
+                with measure(timing, "encode"):
+                    renderer_context["inertia_json"] = budget.measure(request, data)
 
             # add response headers
-            renderer_context["response"]["X-Inertia-Version"] = VERSION
+            response["X-Inertia-Version"] = get_version()
+            patch_vary_headers(response, ("X-Inertia",))
 
             # Only add X-Inertia header on 2XX and 409 responses
-            if is_valid_inertia_response(renderer_context["response"].status_code):
-                renderer_context["response"]["X-Inertia"] = "true"
+            if is_valid_inertia_response(response.status_code):
+                response["X-Inertia"] = "true"
+
+        with measure(timing, self.timing_name):
+            ret = super(InertiaRendererMixin, self).render(
+                data, accepted_media_type=accepted_media_type, renderer_context=renderer_context)
+
+        if response is not None:
+            finish(request, response)
+
+        return ret
+
+
+# compiled templates keyed by the template names they were selected from
+_templates = {}
 
-        return super(InertiaRendererMixin, self).render(
-            data, accepted_media_type=accepted_media_type, renderer_context=renderer_context)
+
+@receiver(setting_changed)
+def clear_templates(setting, **kwargs):
+    if setting == 'TEMPLATES' or setting.startswith('INERTIA_'):
+        _templates.clear()
+
+
+def resolve_response_props(request, response):
+    """
+    Resolves the lazy props of responses for the other renderers (e.g. API
+    requests with Accept: application/json) with the rules of a full visit,
+    the inertia renderers resolve them as they render
+    """
+    if (hasattr(request, "inertia")
+            and isinstance(response, Response)
+            and not isinstance(getattr(response, "accepted_renderer", None), InertiaRendererMixin)
+            and status.is_success(response.status_code)):
+        response.data = request.inertia.resolve(response.data)
+
+    return response
+
+
+async def aresolve_response_props(request, response):
+    """
+    Resolves the lazy props of a response in the event loop so
+    awaitable props are gathered concurrently before the response
+    is rendered (rendering happens synchronously)
+    """
+    if (hasattr(request, "inertia")
+            and isinstance(response, Response)
+            and status.is_success(response.status_code)):
+        inertia = request.inertia
+        with measure(inertia.timing, "props"):
+            response.data = inertia.resolved = await aresolve_props(response.data, inertia)
+
+    return response
 
 
 class InertiaHTMLRenderer(InertiaRendererMixin, TemplateHTMLRenderer):
+    timing_name = "template"
+
+    def resolve_template(self, template_names):
+        # the inertia template is the same for every page so select and
+        # compile it once (except in DEBUG so template edits are picked up)
+        key = tuple(template_names)
+        try:
+            return _templates[key]
+        except KeyError:
+            template = super(InertiaHTMLRenderer, self).resolve_template(template_names)
+            if not DEBUG:
+                _templates[key] = template
+            return template
+
     def get_template_context(self, data, renderer_context):
         context = super(InertiaHTMLRenderer, self).get_template_context(data, renderer_context)
 
-        # add the inertia data as json into the template
-        context[TEMPLATE_VAR] = json.dumps(data)
+        # add the inertia data as json into the template. The template
+        # autoescapes it once when it is placed in the data-page attribute
+        encoded = renderer_context.get("inertia_json")
+        context[TEMPLATE_VAR] = encoded.decode() if encoded is not None else dumps(data)
+
+        # server-side render the page, the template falls back to
+        # rendering client-side when inertia_ssr_body is empty
+        ssr = get_ssr_renderer()
+        if ssr is not None and is_page_response(renderer_context.get("response")):
+            with measure(get_timing(renderer_context["request"]), "ssr"):
+                rendered = ssr.render(encoded if encoded is not None else context[TEMPLATE_VAR].encode())
+            if rendered is not None:
+                context.update(rendered.get_context())
+
         return context
 
 
-class InertiaJSONRenderer(InertiaRendererMixin, JSONRenderer):
-    pass
+class JSONBackendRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with the INERTIA_JSON_BACKEND. Indented
+    responses (e.g. for the browsable API) are still rendered by rest
+    framework's JSONRenderer
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super(JSONBackendRenderer, self).render(
+                data, accepted_media_type=accepted_media_type, renderer_context=renderer_context)
+
+        return self.encode_data(data, renderer_context or {})
+
+    def encode_data(self, data, renderer_context):
+        return encode(data)
+
+
+class InertiaJSONRenderer(InertiaRendererMixin, JSONBackendRenderer):
+    timing_name = "encode"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        ret = super(InertiaJSONRenderer, self).render(
+            data, accepted_media_type=accepted_media_type, renderer_context=renderer_context)
+
+        if getattr(settings, 'INERTIA_ETAG', ETAG) and renderer_context:
+            ret = self.check_etag(ret, renderer_context)
+
+        return ret
+
+    def encode_data(self, data, renderer_context):
+        # the page is already encoded if it has been measured
+        encoded = renderer_context.get("inertia_json")
+        if encoded is not None:
+            return encoded
+
+        return super(InertiaJSONRenderer, self).encode_data(data, renderer_context)
+
+    def check_etag(self, content, renderer_context):
+        """
+        Adds an ETag to successful inertia GET responses and
+        empties the response if the client already has it
+        """
+        request = renderer_context["request"]
+        response = renderer_context["response"]
+        inertia = getattr(request, "inertia", None)
+        if (inertia is None or not inertia.is_data or response is None
+                or response.status_code != status.HTTP_200_OK or request.method not in ("GET", "HEAD")):
+            return content
+
+        etag = inertia.etag or inertia.get_etag(content)
+        response["ETag"] = etag
+        if etag_matches(request, etag):
+            response.status_code = status.HTTP_304_NOT_MODIFIED
+            return b""
+
+        return content
 
 
 class InertiaNegotiation(DefaultContentNegotiation):
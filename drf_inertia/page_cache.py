@@ -0,0 +1,122 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import status
+
+from .cache import get_cache, get_versions, bump_versions, make_key
+from .config import ERRORS_COOKIE, get_version
+from .negotiation import InertiaHTMLRenderer
+from .serializers import has_messages, session_has_key
+
+
+def tag_key(tag):
+    return make_key("html", "tag", tag)
+
+
+def page_key(request, component):
+    parts = "|".join((request.get_full_path(), str(get_version()), component))
+    return make_key("html", hashlib.md5(parts.encode()).hexdigest())
+
+
+def is_cacheable_request(request):
+    """
+    Only full page (HTML) GET requests from anonymous visitors
+    with no flash messages or errors to show can be cached
+    """
+    meta = request.META
+    if request.method != "GET" or meta.get("HTTP_X_INERTIA") or "HTTP_AUTHORIZATION" in meta:
+        return False
+
+    if "text/html" not in meta.get("HTTP_ACCEPT", ""):
+        return False
+
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        user = getattr(request, "user", None)
+        if user is None or user.is_authenticated:
+            return False
+
+    return not has_messages(request) and not session_has_key(request, "errors", ERRORS_COOKIE)
+
+
+def is_cacheable_response(request, response):
+    """
+    Only successful inertia HTML responses that do not set cookies
+    (or depend on the CSRF token) can be cached
+    """
+    return (response.status_code == status.HTTP_200_OK
+            and isinstance(getattr(response, "accepted_renderer", None), InertiaHTMLRenderer)
+            and not response.cookies
+            and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+            and not request.META.get("CSRF_COOKIE_USED"))
+
+
+def get_cached_page(key, tags):
+    """
+    Returns the cached response for the key, or None if it is not
+    cached or one of its tags has been invalidated since it was cached
+    """
+    tag_keys = [tag_key(tag) for tag in tags]
+    cached = get_cache().get_many(tag_keys + [key])
+    if key not in cached:
+        return None
+
+    versions, content, content_type = cached[key]
+    if versions != [get_versions(tag_keys, cached)[k] for k in tag_keys]:
+        return None
+
+    return HttpResponse(content, content_type=content_type)
+
+
+def set_cached_page(key, tags, timeout, response):
+    tag_keys = [tag_key(tag) for tag in tags]
+    versions = get_versions(tag_keys)
+    value = ([versions[k] for k in tag_keys], response.content, response["Content-Type"])
+    get_cache().set(key, value, timeout)
+
+
+def invalidate_pages(*tags):
+    """
+    Invalidates every cached page with any of the tags
+    """
+    bump_versions([tag_key(tag) for tag in tags])
+
+
+def cache_pages(dispatch, component, timeout, tags=()):
+    """
+    Wraps a view's dispatch to serve full page HTML responses for
+    anonymous visitors from the cache, skipping the view entirely
+    """
+    def store(request, key):
+        def callback(response):
+            if is_cacheable_response(request, response):
+                set_cached_page(key, tags, timeout, response)
+        return callback
+
+    def add_callback(request, key, response):
+        if hasattr(response, "add_post_render_callback"):
+            response.add_post_render_callback(store(request, key))
+        return response
+
+    @wraps(dispatch)
+    def cached_dispatch(self, request, *args, **kwargs):
+        if not is_cacheable_request(request):
+            return dispatch(self, request, *args, **kwargs)
+
+        key = page_key(request, component)
+        cached = get_cached_page(key, tags)
+
+        if getattr(self, "view_is_async", False):
+            # async views must return an awaitable
+            async def async_dispatch():
+                if cached is not None:
+                    return cached
+                return add_callback(request, key, await dispatch(self, request, *args, **kwargs))
+            return async_dispatch()
+
+        if cached is not None:
+            return cached
+        return add_callback(request, key, dispatch(self, request, *args, **kwargs))
+
+    return cached_dispatch
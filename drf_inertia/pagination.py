@@ -0,0 +1,45 @@
+from rest_framework import pagination
+
+from .negotiation import InertiaRendererMixin
+from .props import MergeProp
+
+
+class InertiaPaginationMixin(object):
+    """
+    Mixin for rest framework pagination classes that sends the results
+    of inertia responses as a merge prop, so the frontend appends each
+    page to the results it already has (e.g. for infinite scrolling)
+    instead of the view sending every page again:
+    ```
+        @inertia("Posts/Feed")
+        class PostViewSet(viewsets.ReadOnlyModelViewSet):
+            pagination_class = CursorPagination
+            # ...
+
+        // load the next page from the frontend
+        router.reload({only: ["results", "next"], data: {cursor: nextCursor}})
+    ```
+
+    Requests with the X-Inertia-Reset header for the results replace
+    them instead (e.g. when the filters change). Responses for other
+    renderers are paginated as usual
+    """
+    results_key = "results"
+
+    def get_paginated_response(self, data):
+        response = super(InertiaPaginationMixin, self).get_paginated_response(data)
+        if isinstance(getattr(self.request, "accepted_renderer", None), InertiaRendererMixin):
+            response.data[self.results_key] = MergeProp(response.data[self.results_key])
+        return response
+
+
+class PageNumberPagination(InertiaPaginationMixin, pagination.PageNumberPagination):
+    pass
+
+
+class LimitOffsetPagination(InertiaPaginationMixin, pagination.LimitOffsetPagination):
+    pass
+
+
+class CursorPagination(InertiaPaginationMixin, pagination.CursorPagination):
+    pass
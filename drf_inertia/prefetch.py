@@ -0,0 +1,150 @@
+import hashlib
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import get_cache, get_scope, get_versions, bump_versions, make_key
+from .config import PREFETCH_CACHE_TIMEOUT, get_version
+from .exceptions import Prefetched
+from .negotiation import InertiaJSONRenderer
+
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# headers describing the prefetch request itself, not the page
+EXCLUDED_HEADERS = ("Server-Timing", "X-Inertia-Queries")
+
+
+def get_timeout():
+    return getattr(settings, 'INERTIA_PREFETCH_CACHE_TIMEOUT', PREFETCH_CACHE_TIMEOUT)
+
+
+def version_keys(scope):
+    # the version of every prefetched page and of the pages prefetched in the scope
+    return [make_key("prefetch", "version"), make_key("prefetch", scope, "version")]
+
+
+def prefetch_key(request, scope):
+    inertia = request.inertia
+    parts = "|".join((
+        request.get_full_path(),
+        str(get_version()),
+        inertia.component,
+        ",".join(sorted(inertia.partial_data or ())),
+        ",".join(sorted(inertia.reset)),
+    ))
+    return make_key("prefetch", scope, hashlib.md5(parts.encode()).hexdigest())
+
+
+def get_prefetch_scope(request):
+    """
+    Returns the scope the inertia GET request is prefetched in,
+    or None if it cannot be prefetched
+    """
+    inertia = getattr(request, "inertia", None)
+    if inertia is None or not inertia.is_data or request.method != "GET" or not get_timeout():
+        return None
+
+    return get_scope(request)
+
+
+def get_prefetched(request, scope):
+    """
+    Returns the cached response to the prefetch of the request, or None if
+    it was not prefetched or has been invalidated since. A visit uses up
+    the prefetched response, later visits run the view again
+    """
+    cache = get_cache()
+    key = prefetch_key(request, scope)
+    keys = version_keys(scope)
+    cached = cache.get_many(keys + [key])
+    if key not in cached:
+        return None
+
+    if not request.inertia.prefetch:
+        cache.delete(key)
+
+    versions, content, headers = cached[key]
+    if versions != [get_versions(keys, cached)[k] for k in keys]:
+        return None
+
+    response = HttpResponse(content)
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def check_prefetched(request):
+    """
+    Raises Prefetched (returned as the response) if the same user prefetched
+    the page moments ago. Called once the request has been authenticated,
+    and passed the permission and throttle checks
+    """
+    scope = get_prefetch_scope(request)
+    if scope is None:
+        return
+
+    response = get_prefetched(request, scope)
+    if response is not None:
+        raise Prefetched(response)
+
+
+def is_cacheable_response(response):
+    """
+    Only successful inertia JSON responses that do not set
+    cookies (e.g. after reading flash messages) are cached
+    """
+    return (isinstance(response, Response)
+            and response.status_code == status.HTTP_200_OK
+            and isinstance(getattr(response, "accepted_renderer", None), InertiaJSONRenderer))
+
+
+def set_prefetched(request, scope, response):
+    keys = version_keys(scope)
+    versions = get_versions(keys)
+    headers = {header: value for header, value in response.items() if header not in EXCLUDED_HEADERS}
+    value = ([versions[k] for k in keys], response.content, headers)
+    get_cache().set(prefetch_key(request, scope), value, get_timeout())
+
+
+def update_prefetched(request, response):
+    """
+    Caches the response to prefetch requests once it is rendered. Mutations
+    (unsafe inertia requests) invalidate the pages their user prefetched
+    """
+    inertia = getattr(request, "inertia", None)
+    if inertia is None or not inertia.is_data or not get_timeout():
+        return response
+
+    if request.method not in SAFE_METHODS:
+        scope = get_scope(request)
+        if scope is not None:
+            bump_versions(version_keys(scope)[1:])
+        return response
+
+    scope = get_prefetch_scope(request)
+    if inertia.prefetch and scope is not None and is_cacheable_response(response):
+        def callback(response):
+            if response.status_code == status.HTTP_200_OK and not response.cookies:
+                set_prefetched(request, scope, response)
+
+        response.add_post_render_callback(callback)
+
+    return response
+
+
+def invalidate_prefetched(user=None):
+    """
+    Invalidates prefetched pages, e.g. after a mutation that changes them.
+
+    Parameters:
+    user:   Optional. Only invalidate the pages prefetched by this user,
+            otherwise the pages prefetched by every user and session
+            are invalidated
+    """
+    if user is not None:
+        bump_versions(version_keys("user:%s" % user.pk)[1:])
+    else:
+        bump_versions(version_keys(None)[:1])
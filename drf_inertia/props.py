@@ -0,0 +1,394 @@
+import asyncio
+import concurrent.futures
+import inspect
+import itertools
+import time
+from collections.abc import Mapping
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import close_old_connections
+
+from .config import get_executor
+from .queries import count_queries
+
+
+class LazyProp(object):
+    """
+    A prop whose value is only computed when it is actually sent
+    to the frontend.
+
+    Wrap expensive props (querysets, serializers etc.) in a LazyProp
+    so that partial reloads which do not ask for them do not pay
+    for them:
+    ```
+        return Response(data={
+            "users": LazyProp(lambda: UserSerializer(users, many=True).data),
+            "stats": Inertia.lazy(get_stats),
+        })
+    ```
+
+    The callback can also be a coroutine function, awaitable props are
+    resolved concurrently. Slow synchronous props that spend their time
+    waiting on I/O (remote APIs, other databases, search backends) can
+    be marked concurrent to resolve them on a thread pool alongside the
+    other props.
+
+    Parameters:
+    callback (callable): Called with no arguments to get the value of the prop
+    optional (bool):     If True the prop is only included when a partial
+                         reload explicitly asks for it, otherwise it is also
+                         included (and resolved) on full visits
+    concurrent (bool):   Resolve the prop on the INERTIA_PROP_THREADS pool
+    timeout (float):     Optional. The number of seconds to wait for a
+                         concurrent or awaitable prop
+    fallback:            The value used when the prop times out
+    """
+    def __init__(self, callback, optional=False, concurrent=False, timeout=None, fallback=None):
+        self.callback = callback
+        self.optional = optional
+        self.concurrent = concurrent
+        self.timeout = timeout
+        self.fallback = fallback
+
+    def should_resolve(self, name, inertia):
+        if inertia.partial_data:
+            return inertia.include(name)
+
+        return not self.optional
+
+    def resolve(self, asynchronous=False):
+        """
+        Returns the value of the prop, possibly an awaitable or a pending
+        prop. When asynchronous (in the event loop of an async view)
+        synchronous callbacks are run with sync_to_async, so they can use
+        the ORM, and an awaitable is returned
+        """
+        if self.concurrent and not inspect.iscoroutinefunction(self.callback):
+            return submit(self.callback, timeout=self.timeout, fallback=self.fallback)
+
+        if asynchronous and not inspect.iscoroutinefunction(self.callback):
+            value = call_sync(self.callback)
+        else:
+            value = self.callback()
+        if self.timeout is not None and inspect.isawaitable(value):
+            return wait_for(value, self.timeout, self.fallback)
+
+        return value
+
+
+class DeferredProp(LazyProp):
+    """
+    A prop that is left out of the first response for the page and
+    fetched by the frontend with a partial reload once the page has
+    rendered, so slow props do not hold up the first render:
+    ```
+        return Response(data={
+            "orders": Orders.objects.count(),
+            "stats": DeferredProp(get_stats),
+            "teams": Inertia.defer(get_teams, group="sidebar"),
+            "projects": Inertia.defer(get_projects, group="sidebar"),
+        })
+    ```
+
+    The names of the deferred props are listed by group in the
+    deferredProps of the page object. The frontend fetches each group
+    with one partial reload.
+
+    Parameters:
+    callback (callable): Called with no arguments to get the value of the prop
+    group (string):      Deferred props in the same group are fetched together
+    **kwargs:            The other LazyProp arguments (concurrent, timeout etc.)
+    """
+    def __init__(self, callback, group="default", **kwargs):
+        kwargs["optional"] = True
+        super(DeferredProp, self).__init__(callback, **kwargs)
+        self.group = group
+
+
+class MergeProp(LazyProp):
+    """
+    A prop that the frontend merges into its current value instead of
+    replacing it, e.g. to append the next page of an infinite scroll
+    list loaded with a partial reload. Deep merged props are merged
+    recursively. The props are listed in the mergeProps (or
+    deepMergeProps) of the page object, except when the request
+    resets them with the X-Inertia-Reset header:
+    ```
+        return Response(data={
+            "posts": MergeProp(PostSerializer(page, many=True).data),
+            "filters": Inertia.merge(get_filters, deep=True),
+        })
+    ```
+
+    Parameters:
+    value:      The value, or a callable returning the value
+    deep (bool): Merge the value recursively
+    **kwargs:   The other LazyProp arguments (concurrent, timeout etc.)
+    """
+    def __init__(self, value, deep=False, **kwargs):
+        self.is_value = not callable(value)
+        callback = (lambda: value) if self.is_value else value
+        super(MergeProp, self).__init__(callback, **kwargs)
+        self.deep = deep
+
+    def resolve(self, asynchronous=False):
+        if self.is_value:
+            return self.callback()
+
+        return super(MergeProp, self).resolve(asynchronous)
+
+
+class StreamProp(object):
+    """
+    A list prop for very large results (tens of thousands of rows).
+
+    Inertia JSON responses with stream props are sent as a streaming
+    response: the items are read, serialized and encoded in batches as
+    the response is sent instead of building the whole page in memory.
+    Querysets are read with .iterator() so they are not cached either:
+    ```
+        return Response(data={
+            "orders": StreamProp(Order.objects.all(), serializer_class=OrderSerializer),
+            "events": StreamProp(read_events(), transform=format_event),
+        })
+    ```
+
+    Full page (HTML) responses include the items as a list as usual.
+
+    Parameters:
+    items (iterable):         A queryset, generator or other iterable
+    serializer_class (class): Optional. Serializes each batch of items
+                              with many=True
+    transform (callable):     Optional. Called with each item to get the
+                              value that is sent
+    batch_size (int):         The number of items read (and encoded) at a time
+    """
+    def __init__(self, items, serializer_class=None, transform=None, batch_size=1000):
+        self.items = items
+        self.serializer_class = serializer_class
+        self.transform = transform
+        self.batch_size = batch_size
+
+    def iter_items(self):
+        if hasattr(self.items, "iterator"):
+            return self.items.iterator(chunk_size=self.batch_size)
+
+        return iter(self.items)
+
+    def iter_batches(self):
+        """
+        Yields lists of at most batch_size serialized items
+        """
+        items = self.iter_items()
+        while True:
+            batch = list(itertools.islice(items, self.batch_size))
+            if not batch:
+                return
+
+            if self.serializer_class is not None:
+                batch = self.serializer_class(batch, many=True).data
+            if self.transform is not None:
+                batch = [self.transform(item) for item in batch]
+            yield batch
+
+    def __iter__(self):
+        # JSON encoders convert iterables to lists
+        for batch in self.iter_batches():
+            yield from batch
+
+
+def has_stream_props(props):
+    """
+    Checks if there are any stream props in the (resolved) props
+    """
+    return any(isinstance(value, StreamProp)
+               or (isinstance(value, Mapping) and has_stream_props(value))
+               for value in props.values())
+
+
+async def call_sync(callback):
+    # runs a synchronous callback from the event loop in the thread
+    # sync_to_async uses for the ORM, callbacks can return awaitables
+    value = await sync_to_async(callback)()
+    if inspect.isawaitable(value):
+        value = await value
+    return value
+
+
+async def wait_for(awaitable, timeout, fallback):
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        return fallback
+
+
+def run_in_thread(func, *args):
+    try:
+        return func(*args)
+    finally:
+        # worker threads are not request threads so clean up
+        # their database connections like a request would
+        close_old_connections()
+
+
+def submit(func, *args, timeout=None, fallback=None):
+    """
+    Starts func(*args) on the thread pool and returns a PendingProp
+    """
+    return PendingProp(get_executor().submit(run_in_thread, func, *args), timeout, fallback)
+
+
+class PendingProp(object):
+    """
+    A prop being resolved on the thread pool. The timeout
+    starts when the prop is submitted
+    """
+    def __init__(self, future, timeout=None, fallback=None):
+        self.future = future
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.fallback = fallback
+
+    def get_timeout(self):
+        if self.deadline is None:
+            return None
+
+        return max(0, self.deadline - time.monotonic())
+
+    def result(self):
+        try:
+            return self.future.result(self.get_timeout())
+        except concurrent.futures.TimeoutError:
+            self.future.cancel()
+            return self.fallback
+
+    async def aresult(self):
+        return await wait_for(asyncio.wrap_future(self.future), self.get_timeout(), self.fallback)
+
+
+def get_partial_tree(partial_data):
+    """
+    Converts a list of (possibly dotted) prop paths into a tree of keys.
+
+    A value of None in the tree means the whole prop is included:
+    ["user.name", "user.email", "teams"] becomes
+    {"user": {"name": None, "email": None}, "teams": None}
+    """
+    tree = {}
+    for path in partial_data:
+        node = tree
+        keys = path.split(".")
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+            if node is None:
+                # a parent of this path is already fully included
+                break
+        else:
+            node[keys[-1]] = None
+
+    return tree
+
+
+def prune_props(props, tree):
+    """
+    Returns only the parts of props that are in the partial tree,
+    resolving any lazy props that are included
+    """
+    if isinstance(props, LazyProp):
+        props = props.resolve()
+
+    if tree is None or not isinstance(props, Mapping):
+        return props
+
+    return {name: prune_props(props[name], subtree)
+            for name, subtree in tree.items() if name in props}
+
+
+def select_props(props, inertia, asynchronous=False):
+    """
+    Returns the props that should be sent for the inertia request with
+    every included LazyProp resolved (possibly to an awaitable)
+    """
+    selected = {}
+    for name, value in props.items():
+        if isinstance(value, LazyProp):
+            if not value.should_resolve(name, inertia):
+                if isinstance(value, DeferredProp) and not inertia.partial_data:
+                    inertia.add_deferred(name, value.group)
+                continue
+            if isinstance(value, MergeProp):
+                inertia.add_merged(name, value.deep)
+            with count_queries(inertia.queries, name):
+                value = value.resolve(asynchronous)
+        elif not inertia.include(name):
+            continue
+        selected[name] = value
+
+    return selected
+
+
+def is_pending(value):
+    return isinstance(value, PendingProp) or inspect.isawaitable(value)
+
+
+async def gather_props(props):
+    """
+    Awaits all the awaitable and pending props concurrently
+    """
+    names = [name for name, value in props.items() if is_pending(value)]
+    if names:
+        values = await asyncio.gather(*(
+            props[name].aresult() if isinstance(props[name], PendingProp) else props[name]
+            for name in names))
+        props.update(zip(names, values))
+
+    return props
+
+
+def wait_props(props):
+    """
+    Waits for the props being resolved on the thread pool
+    """
+    for name, value in props.items():
+        if isinstance(value, PendingProp):
+            props[name] = value.result()
+
+    return props
+
+
+def resolve_props(props, inertia):
+    """
+    Returns a copy of props with every LazyProp either resolved or
+    dropped depending on the inertia request.
+
+    For partial reloads only the props (or nested keys) listed in
+    inertia.partial_data are returned
+    """
+    if not isinstance(props, Mapping):
+        return props
+
+    props = select_props(props, inertia)
+    if any(inspect.isawaitable(value) for value in props.values()):
+        props = async_to_sync(gather_props)(props)
+    else:
+        props = wait_props(props)
+
+    if inertia.partial_data:
+        return prune_props(props, get_partial_tree(inertia.partial_data))
+
+    return props
+
+
+async def aresolve_props(props, inertia):
+    """
+    Async version of resolve_props for use in async views
+    """
+    if not isinstance(props, Mapping):
+        return props
+
+    props = await gather_props(select_props(props, inertia, asynchronous=True))
+
+    if inertia.partial_data:
+        # nested lazy props are resolved while pruning
+        return await sync_to_async(prune_props)(props, get_partial_tree(inertia.partial_data))
+
+    return props
@@ -0,0 +1,116 @@
+import logging
+import re
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+
+from django.conf import settings
+from django.db import connections
+
+from .config import QUERY_CHECK, QUERY_THRESHOLD
+from .exceptions import QueryThresholdExceeded
+
+
+logger = logging.getLogger("drf_inertia.queries")
+
+re_in_params = re.compile(r"\bIN \((?:%s, )*%s\)")
+re_whitespace = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """
+    Returns the sql with the lists of IN parameters and the whitespace
+    collapsed, so queries that only differ by their parameters match
+    """
+    return re_whitespace.sub(" ", re_in_params.sub("IN (...)", sql)).strip()
+
+
+class QueryCounter(object):
+    """
+    Counts the queries (on every database) run while each lazy prop
+    and shared field is resolved, when INERTIA_QUERY_CHECK is enabled.
+
+    Props resolved on other threads (concurrent and awaitable props)
+    use other database connections, so their queries are not counted
+    """
+    def __init__(self, threshold=None):
+        self.threshold = threshold
+        self.queries = {}
+
+    def record(self, name):
+        def wrapper(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.queries.setdefault(name, []).append((sql, time.perf_counter() - started))
+        return wrapper
+
+    @contextmanager
+    def count(self, name):
+        self.queries.setdefault(name, [])
+        with ExitStack() as stack:
+            wrapper = self.record(name)
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(wrapper))
+            yield
+
+    def get_report(self):
+        """
+        Returns {name: (count, milliseconds, repeated)} where repeated
+        maps each query run more than once to the number of times it ran
+        """
+        report = {}
+        for name, queries in self.queries.items():
+            runs = {}
+            for sql, _ in queries:
+                sql = normalize_sql(sql)
+                runs[sql] = runs.get(sql, 0) + 1
+
+            repeated = {sql: count for sql, count in runs.items() if count > 1}
+            report[name] = (len(queries), sum(duration for _, duration in queries) * 1000, repeated)
+        return report
+
+    def get_header(self, report):
+        return ", ".join(
+            "%s;count=%d;dur=%.3f;repeated=%d" % (name, count, ms, sum(repeated.values()))
+            for name, (count, ms, repeated) in report.items())
+
+    def finish(self, request, response):
+        """
+        Called once the response has been rendered
+        """
+        report = self.get_report()
+        if not report:
+            return
+
+        response["X-Inertia-Queries"] = self.get_header(report)
+
+        for name, (count, ms, repeated) in report.items():
+            for sql, times in repeated.items():
+                logger.warning("%s %s: %r ran %d similar queries (possible N+1): %s",
+                               request.method, request.path, name, times, sql)
+
+        exceeded = {name: count for name, (count, _, _) in report.items()
+                    if self.threshold is not None and count > self.threshold}
+        if exceeded:
+            raise QueryThresholdExceeded(
+                "%s %s ran more than %d queries in %s" % (
+                    request.method, request.path, self.threshold,
+                    ", ".join("%r (%d)" % item for item in exceeded.items())))
+
+
+def create_query_counter():
+    """
+    Returns a new QueryCounter, or None if INERTIA_QUERY_CHECK is disabled
+    """
+    if not getattr(settings, 'INERTIA_QUERY_CHECK', QUERY_CHECK):
+        return None
+
+    return QueryCounter(getattr(settings, 'INERTIA_QUERY_THRESHOLD', QUERY_THRESHOLD))
+
+
+def count_queries(queries, name):
+    """
+    Counts the queries run in the block with the counter if there is one
+    """
+    return queries.count(name) if queries is not None else nullcontext()
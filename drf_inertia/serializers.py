@@ -1,9 +1,18 @@
 from collections import OrderedDict
 from django.contrib import messages
-from django.utils.module_loading import import_string
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.messages.storage.session import SessionStorage
+from django.contrib.sessions.backends.base import SessionBase
+from django.dispatch import receiver
 from rest_framework import serializers, fields, status
 
-from .config import SHARED_DATA_SERIALIZER
+from .cache import get_cache, get_scope, get_versions, bump_versions, make_key
+from .config import ERRORS_COOKIE, SHARED_CACHE_TIMEOUT, get_shared_serializer_class, get_version
+from .props import submit, wait_props
+from .queries import count_queries
+from .signals import shared_data_changed
+from .timing import get_timing, measure
 
 
 class SharedSerializerBase(serializers.Serializer):
@@ -31,9 +40,9 @@ class SharedSerializerBase(serializers.Serializer):
     """
     def __init__(self, instance=None, *args, **kwargs):
         # exclude fields already in data or not in instance.partial_data
-        exclude = instance.inertia.data.keys()
+        exclude = list(instance.inertia.data.keys())
         for field in self.fields:
-            if instance.inertia.partial_data and field not in instance.inertia.partial_data:
+            if not instance.inertia.include(field):
                 exclude.append(field)
 
         for field in exclude:
@@ -42,10 +51,43 @@ class SharedSerializerBase(serializers.Serializer):
 
         super(SharedSerializerBase, self).__init__(instance, *args, **kwargs)
 
+    @property
+    def _readable_fields(self):
+        inertia = self.instance.inertia
+        for field in super(SharedSerializerBase, self)._readable_fields:
+            # concurrent fields are resolved separately
+            if getattr(field, "concurrent", False):
+                continue
+
+            # each field is serialized before the next one is requested
+            name = "shared." + field.field_name
+            with measure(inertia.timing, name), count_queries(inertia.queries, name):
+                yield field
+
+    @property
+    def _concurrent_fields(self):
+        for field in self.fields.values():
+            if getattr(field, "concurrent", False) and not field.write_only:
+                yield field
+
     def to_representation(self, instance):
+        # start the concurrent fields on the thread pool and
+        # serialize the other fields while they run
+        timing = get_timing(self.context.get("request"))
+        pending = {}
+        for field in self._concurrent_fields:
+            to_representation = field.to_representation
+            if timing is not None:
+                to_representation = timing.timed("shared." + field.field_name, to_representation)
+            pending[field.field_name] = submit(
+                to_representation, field.get_attribute(instance),
+                timeout=field.timeout, fallback=field.fallback)
+
+        data = super(SharedSerializerBase, self).to_representation(instance)
+        data.update(wait_props(pending))
+
         # merge the shared data with the component data
         # ensuring that component data is always prioritized
-        data = super(SharedSerializerBase, self).to_representation(instance)
         data.update(instance.inertia.data)
         return data
 
@@ -53,11 +95,19 @@ class SharedSerializerBase(serializers.Serializer):
 class SharedField(fields.Field):
     """
     Shared fields by default are Read-only and require a context
+
+    Shared fields that spend their time waiting on I/O can be marked
+    concurrent to resolve them on the INERTIA_PROP_THREADS pool while
+    the other fields are serialized. The fallback is used if the
+    field takes longer than timeout seconds.
     """
     requires_context = True
 
-    def __init__(self, **kwargs):
+    def __init__(self, concurrent=False, timeout=None, fallback=None, **kwargs):
         kwargs['read_only'] = True
+        self.concurrent = concurrent
+        self.timeout = timeout
+        self.fallback = fallback
         super().__init__(**kwargs)
 
     @property
@@ -68,11 +118,64 @@ class SharedField(fields.Field):
         return instance
 
 
+def session_has_key(request, key, flag_cookie=None):
+    """
+    Checks if key is in the request's session, avoiding loading the
+    session from the session backend when it is known to be empty:
+    there is no session cookie, or flag_cookie is given and was not
+    set by the response that stored the key
+    """
+    session = getattr(request, "session", None)
+    if session is None:
+        return False
+
+    if isinstance(session, SessionBase) and not hasattr(session, "_session_cache"):
+        # the session has not been loaded yet
+        if session.session_key is None:
+            return False
+
+        if flag_cookie and flag_cookie not in request.COOKIES:
+            return False
+
+    return key in session
+
+
+def has_messages(request):
+    """
+    Checks if there are any messages for the request without
+    loading them from the message storage when possible
+    """
+    storage = getattr(request, "_messages", None)
+    if storage is None:
+        return False
+
+    if storage._queued_messages:
+        return True
+
+    if hasattr(storage, "_loaded_data"):
+        # already loaded
+        return bool(storage._loaded_data)
+
+    if isinstance(storage, FallbackStorage) and isinstance(storage.storages[0], CookieStorage):
+        # the fallback storage only reads the session when
+        # the messages cookie says there are more messages
+        storage = storage.storages[0]
+
+    if isinstance(storage, CookieStorage):
+        return storage.cookie_name in request.COOKIES
+
+    if isinstance(storage, SessionStorage):
+        return session_has_key(request, storage.session_key)
+
+    return True
+
+
 class FlashSerializer(SharedField):
     def to_representation(self, value):
         # no need to iterate (and mark used) messages if 409 response
+        # or if there are no messages
         flash = {}
-        if not self.is_conflict:
+        if not self.is_conflict and has_messages(self.context["request"]):
             storage = messages.get_messages(self.context["request"])
             for message in storage:
                 flash[message.level_tag] = message.message
@@ -80,22 +183,136 @@ class FlashSerializer(SharedField):
 
 
 class SessionSerializerField(SharedField):
-    def __init__(self, session_field, **kwargs):
+    """
+    Pops session_field from the session.
+
+    If flag_cookie is given the session is only loaded to look for the
+    field when the cookie is set (or the session is already loaded) and
+    the cookie is deleted once the field has been popped
+    """
+    def __init__(self, session_field, flag_cookie=None, **kwargs):
         self.session_field = session_field
+        self.flag_cookie = flag_cookie
         super(SessionSerializerField, self).__init__(**kwargs)
 
     def to_representation(self, value):
-        if not hasattr(self.context["request"], "session"):
+        request = self.context["request"]
+        if self.is_conflict:
             return {}
 
-        if not self.is_conflict and self.session_field in self.context["request"].session:
-            return self.context["request"].session.pop(self.session_field, None)
+        if self.flag_cookie and self.flag_cookie in request.COOKIES:
+            self.context["response"].delete_cookie(self.flag_cookie)
+
+        if session_has_key(request, self.session_field, self.flag_cookie):
+            return request.session.pop(self.session_field, None)
 
         return {}
 
 
+class CachedSharedField(SharedField):
+    """
+    A shared field whose value is cached per user (or per session for
+    anonymous users) with django's cache framework, so that expensive
+    shared data is not recomputed on every inertia response.
+
+    The value is returned by a method on the serializer, which receives
+    the request (like a SerializerMethodField):
+    ```
+        class SharedSerializer(DefaultSharedSerializer):
+            permissions = CachedSharedField(timeout=600)
+
+            def get_permissions(self, request):
+                return sorted(request.user.get_all_permissions())
+    ```
+
+    Cached values are used until they time out or are invalidated with
+    invalidate_shared_fields (or the shared_data_changed signal). Requests
+    with neither a user nor a session are never cached. Concurrent cached
+    fields take their wait timeout as concurrent_timeout.
+    """
+    def __init__(self, method_name=None, timeout=None, **kwargs):
+        self.method_name = method_name
+        # timeout is the number of seconds the value is cached for, the
+        # timeout of concurrent fields is set with concurrent_timeout
+        self.cache_timeout = SHARED_CACHE_TIMEOUT if timeout is None else timeout
+        kwargs['timeout'] = kwargs.pop('concurrent_timeout', None)
+        kwargs['source'] = '*'
+        super(CachedSharedField, self).__init__(**kwargs)
+
+    def bind(self, field_name, parent):
+        if self.method_name is None:
+            self.method_name = 'get_{field_name}'.format(field_name=field_name)
+
+        super(CachedSharedField, self).bind(field_name, parent)
+
+    def get_scope(self, request):
+        return get_scope(request)
+
+    def get_value(self, request):
+        return getattr(self.parent, self.method_name)(request)
+
+    def to_representation(self, request):
+        # memoize the value on the request so the cache is
+        # only hit once per field per request
+        memo = request.__dict__.setdefault("_inertia_shared_fields", {})
+        if self.field_name in memo:
+            return memo[self.field_name]
+
+        scope = self.get_scope(request)
+        if scope is None:
+            value = self.get_value(request)
+        else:
+            value = self.get_cached_value(request, scope)
+
+        memo[self.field_name] = value
+        return value
+
+    def get_cached_value(self, request, scope):
+        cache = get_cache()
+        version_key = shared_version_key(self.field_name)
+        value_key = shared_value_key(self.field_name, scope)
+
+        cached = cache.get_many([version_key, value_key])
+        version = get_versions([version_key], cached)[version_key]
+        if value_key in cached and cached[value_key][0] == version:
+            return cached[value_key][1]
+
+        value = self.get_value(request)
+        cache.set(value_key, (version, value), self.cache_timeout)
+        return value
+
+
+def shared_version_key(field_name):
+    return make_key("shared", field_name, "version")
+
+
+def shared_value_key(field_name, scope):
+    return make_key("shared", field_name, scope)
+
+
+def invalidate_shared_fields(fields, user=None):
+    """
+    Invalidates the cached values of CachedSharedFields.
+
+    Parameters:
+    fields (list):  The names of the fields to invalidate
+    user:           Optional. Only invalidate the values cached for
+                    this user, otherwise the values for every user
+                    and session are invalidated
+    """
+    if user is not None:
+        get_cache().delete_many([shared_value_key(field, "user:%s" % user.pk) for field in fields])
+    else:
+        bump_versions([shared_version_key(field) for field in fields])
+
+
+@receiver(shared_data_changed)
+def shared_data_changed_handler(sender, fields, user=None, **kwargs):
+    invalidate_shared_fields(fields, user=user)
+
+
 class DefaultSharedSerializer(SharedSerializerBase):
-    errors = SessionSerializerField("errors", default=OrderedDict(), source='*')
+    errors = SessionSerializerField("errors", flag_cookie=ERRORS_COOKIE, default=OrderedDict(), source='*')
     flash = FlashSerializer(default=OrderedDict(), source='*')
 
 
@@ -106,6 +323,44 @@ class InertiaSerializer(serializers.Serializer):
     url = serializers.URLField()
 
     def get_props(self, obj):
-        serializer_class = import_string(SHARED_DATA_SERIALIZER)
-        serializer = serializer_class(self.context["request"], context=self.context)
+        return get_props(self.context)
+
+
+def get_props(context):
+    """
+    Returns the props for the inertia response: the view data on the
+    request's inertia object merged with the shared data
+    """
+    serializer_class = get_shared_serializer_class()
+    with measure(get_timing(context["request"]), "shared"):
+        serializer = serializer_class(context["request"], context=context)
         return serializer.data
+
+
+def get_page(inertia, context):
+    """
+    Builds the inertia page object directly. This is equivalent to
+    InertiaSerializer(inertia, context=context).data without binding
+    and running serializer fields on every response.
+
+    The version is always the current asset version so that the
+    frontend sends it back on subsequent visits. Deferred props that
+    were left out are listed by group in deferredProps and merge props
+    in mergeProps or deepMergeProps
+    """
+    page = {
+        "component": inertia.component,
+        "props": get_props(context),
+        "version": get_version(),
+        "url": inertia.url,
+    }
+    if inertia.deferred:
+        page["deferredProps"] = inertia.deferred
+    if inertia.merged:
+        merge = [name for name, deep in inertia.merged.items() if not deep]
+        deep_merge = [name for name, deep in inertia.merged.items() if deep]
+        if merge:
+            page["mergeProps"] = merge
+        if deep_merge:
+            page["deepMergeProps"] = deep_merge
+    return page
@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+
+# Sent to invalidate cached shared fields, with the arguments:
+#   fields: the names of the CachedSharedFields to invalidate
+#   user:   optional, only invalidate the fields cached for this user
+shared_data_changed = Signal()
@@ -0,0 +1,183 @@
+import hashlib
+import http.client
+import json
+import logging
+import queue
+import socket
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from django.utils.safestring import mark_safe
+
+
+logger = logging.getLogger("drf_inertia.ssr")
+
+
+class SSRError(Exception):
+    """
+    Raised when the SSR server cannot render a page
+    """
+
+
+class RenderedPage(object):
+    """
+    The head tags and body rendered by the SSR server
+    """
+    def __init__(self, head, body):
+        self.head = head
+        self.body = body
+
+    def get_context(self):
+        # the SSR server renders the frontend app, so its output is trusted
+        return {
+            "inertia_ssr_head": mark_safe("\n".join(self.head)),
+            "inertia_ssr_body": mark_safe(self.body),
+        }
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super(UnixHTTPConnection, self).__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class SSRClient(object):
+    """
+    Sends pages to the SSR server. Subclass it and set INERTIA_SSR_CLIENT
+    to render pages another way, e.g. with a stub in tests
+    """
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+
+    def render(self, page):
+        """
+        Renders the page (JSON encoded bytes), returning a RenderedPage
+        or raising SSRError
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class HTTPSSRClient(SSRClient):
+    """
+    Posts pages to the inertia SSR server (e.g. node bootstrap/ssr/ssr.mjs)
+    at /render over a pool of keep-alive connections, so the connections
+    to the server are reused between requests
+    """
+    # the maximum number of idle connections kept open
+    pool_size = 4
+
+    def __init__(self, url, timeout):
+        super(HTTPSSRClient, self).__init__(url, timeout)
+        self.pool = queue.LifoQueue(self.pool_size)
+
+    def connect(self):
+        url = urlsplit(self.url)
+        if url.scheme == "unix":
+            return UnixHTTPConnection(url.path, timeout=self.timeout)
+
+        return http.client.HTTPConnection(url.hostname, url.port or 80, timeout=self.timeout)
+
+    def get_connection(self):
+        try:
+            return self.pool.get_nowait(), True
+        except queue.Empty:
+            return self.connect(), False
+
+    def release(self, connection):
+        try:
+            self.pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def post(self, connection, page):
+        connection.request("POST", "/render", body=page, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, response.read()
+
+    def render(self, page):
+        connection, reused = self.get_connection()
+        try:
+            try:
+                status, content = self.post(connection, page)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if not reused:
+                    raise
+
+                # the server closed the idle connection, try a new one
+                connection.close()
+                connection = self.connect()
+                status, content = self.post(connection, page)
+        except (OSError, http.client.HTTPException) as exc:
+            connection.close()
+            raise SSRError("SSR request failed: %r" % exc)
+
+        self.release(connection)
+
+        if status != 200:
+            raise SSRError("SSR server responded %d: %s" % (status, content[:200]))
+
+        try:
+            rendered = json.loads(content)
+            return RenderedPage(rendered["head"], rendered["body"])
+        except (ValueError, KeyError, TypeError):
+            raise SSRError("SSR server returned an invalid response: %s" % content[:200])
+
+    def close(self):
+        while True:
+            try:
+                self.pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class SSRRenderer(object):
+    """
+    Renders pages with the SSR client, keeping the most recently rendered
+    pages in memory. Pages are keyed by a hash of the whole page object
+    (component, props, url and version), so only identical pages are reused
+    """
+    def __init__(self, client, cache_size=0):
+        self.client = client
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def render(self, page):
+        """
+        Returns the RenderedPage for the page (JSON encoded bytes) or None
+        if it could not be rendered, so the page is rendered client-side
+        """
+        key = hashlib.md5(page).hexdigest() if self.cache_size else None
+        if key is not None:
+            with self.lock:
+                rendered = self.cache.get(key)
+                if rendered is not None:
+                    self.cache.move_to_end(key)
+                    return rendered
+
+        try:
+            rendered = self.client.render(page)
+        except SSRError as exc:
+            logger.warning("Falling back to client-side rendering: %s", exc)
+            return None
+
+        if key is not None:
+            with self.lock:
+                self.cache[key] = rendered
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+
+        return rendered
+
+    def close(self):
+        self.client.close()
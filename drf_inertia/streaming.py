@@ -0,0 +1,161 @@
+import re
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from rest_framework import status
+from rest_framework.response import Response
+
+from .config import STREAM_COMPRESSION, get_version
+from .encoders import encode
+from .negotiation import InertiaJSONRenderer, finish
+from .props import StreamProp, has_stream_props
+from .serializers import get_page
+from .timing import measure
+
+# brotli is optional
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# the minimum size of the chunks sent to the client
+CHUNK_SIZE = 16 * 1024
+
+re_accepts_gzip = re.compile(r"\bgzip\b")
+re_accepts_br = re.compile(r"\bbr\b")
+
+
+def iter_json(data):
+    """
+    Yields data encoded as JSON, encoding the items of
+    stream props a batch at a time
+    """
+    if isinstance(data, StreamProp):
+        yield b"["
+        for i, batch in enumerate(data.iter_batches()):
+            # the encoded items without the list brackets
+            items = encode(batch)[1:-1]
+            yield b"," + items if i else items
+        yield b"]"
+    elif isinstance(data, Mapping) and has_stream_props(data):
+        yield b"{"
+        for i, (key, value) in enumerate(data.items()):
+            yield (b"," if i else b"") + encode(str(key)) + b":"
+            yield from iter_json(value)
+        yield b"}"
+    else:
+        yield encode(data)
+
+
+def join_chunks(chunks, size=CHUNK_SIZE):
+    """
+    Joins small chunks so each chunk sent is at least size bytes
+    """
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield b"".join(buffer)
+            buffer = []
+            buffered = 0
+
+    if buffer:
+        yield b"".join(buffer)
+
+
+def compress(chunks, content_encoding):
+    """
+    Compresses the chunks as they are sent with gzip or brotli ("br")
+    """
+    if content_encoding == "br":
+        compressor = brotli.Compressor()
+        for chunk in chunks:
+            # flush every chunk so it is sent straight away
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+    else:
+        yield from compress_sequence(chunks)
+
+
+def get_content_encoding(request, compression=None):
+    """
+    Returns the encoding to compress a streamed response with, if any.
+    compression defaults to INERTIA_STREAM_COMPRESSION
+    """
+    if compression is None:
+        compression = getattr(settings, 'INERTIA_STREAM_COMPRESSION', STREAM_COMPRESSION)
+
+    if not compression:
+        return None
+
+    accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    if brotli is not None and re_accepts_br.search(accept_encoding):
+        return "br"
+    if re_accepts_gzip.search(accept_encoding):
+        return "gzip"
+    return None
+
+
+class InertiaStreamingResponse(StreamingHttpResponse):
+    """
+    Streams an inertia page object containing stream props
+    """
+    def __init__(self, page, content_encoding=None, **kwargs):
+        chunks = join_chunks(iter_json(page))
+        if content_encoding:
+            chunks = compress(chunks, content_encoding)
+
+        super(InertiaStreamingResponse, self).__init__(chunks, content_type="application/json", **kwargs)
+
+        self["X-Inertia"] = "true"
+        self["X-Inertia-Version"] = get_version()
+        patch_vary_headers(self, ("X-Inertia",))
+        if content_encoding:
+            self["Content-Encoding"] = content_encoding
+            patch_vary_headers(self, ("Accept-Encoding",))
+
+
+def stream_response(request, response, compression=None):
+    """
+    Replaces a successful inertia JSON response with an InertiaStreamingResponse
+    when its props contain stream props. Other responses are returned as they are
+    """
+    if (not isinstance(response, Response)
+            or not isinstance(getattr(response, "accepted_renderer", None), InertiaJSONRenderer)
+            or response.status_code != status.HTTP_200_OK
+            or not isinstance(response.data, Mapping)):
+        return response
+
+    # resolve the props first, lazy props can return stream props
+    inertia = request.inertia
+    timing = inertia.timing
+    props = inertia.resolve(response.data)
+    if not has_stream_props(props):
+        response.data = props
+        return response
+
+    # shared fields can set cookies on the response, which
+    # are copied to the streaming response
+    inertia.data = props
+    with measure(timing, "page"):
+        page = get_page(inertia, dict(response.renderer_context, response=response))
+
+    streaming = InertiaStreamingResponse(
+        page, content_encoding=get_content_encoding(request, compression), status=response.status_code)
+    for header, value in response.items():
+        if header.lower() == "vary":
+            # keep the Vary headers of the streaming response too
+            patch_vary_headers(streaming, [v.strip() for v in value.split(",")])
+        elif header.lower() != "content-type":
+            streaming[header] = value
+    streaming.cookies = response.cookies
+
+    # the page is encoded as it is streamed, after the headers are sent
+    finish(request, streaming)
+    return streaming
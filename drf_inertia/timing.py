@@ -0,0 +1,107 @@
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+from .config import get_timing_collector_class
+
+
+logger = logging.getLogger("drf_inertia.timing")
+
+
+class TimingCollector(object):
+    """
+    Records how long each stage of an inertia request takes when
+    INERTIA_TIMING is enabled:
+
+    - initial:         Inertia.from_request, the version check, authentication,
+                       permissions and throttling
+    - inertia:         Inertia.from_request
+    - view:            the view (and the exception handler)
+    - props:           resolving lazy props
+    - page:            building the page object, including the shared data
+    - shared:          the shared serializer
+    - shared.<field>:  each shared field
+    - encode:          encoding the page as JSON
+    - template:        rendering the HTML template
+    - ssr:             server-side rendering the page (part of template)
+
+    Durations of the same stage are added together. Once the response is
+    rendered the timings are added to it as a Server-Timing header and
+    passed to report(), which logs them to the "drf_inertia.timing" logger.
+    Subclass it and set INERTIA_TIMING_COLLECTOR to send them elsewhere
+    """
+    # add the Server-Timing header to responses
+    server_timing = True
+
+    def __init__(self):
+        self.timings = {}
+        self.started = {}
+
+    def add(self, name, duration):
+        self.timings[name] = self.timings.get(name, 0) + duration
+
+    def start(self, name):
+        self.started[name] = time.perf_counter()
+
+    def stop(self, name):
+        started = self.started.pop(name, None)
+        if started is not None:
+            self.add(name, time.perf_counter() - started)
+
+    @contextmanager
+    def measure(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def timed(self, name, func):
+        """
+        Returns func wrapped to measure each call (e.g. on another thread)
+        """
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.measure(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def get_milliseconds(self):
+        return {name: duration * 1000 for name, duration in self.timings.items()}
+
+    def get_server_timing(self):
+        return ", ".join("%s;dur=%.3f" % item for item in self.get_milliseconds().items())
+
+    def finish(self, request, response):
+        """
+        Called once the response has been rendered
+        """
+        if self.server_timing and self.timings:
+            response["Server-Timing"] = self.get_server_timing()
+        self.report(request, response)
+
+    def report(self, request, response):
+        logger.debug(
+            "%s %s %s", request.method, request.path, self.get_server_timing(),
+            extra={"inertia_timings": self.get_milliseconds(), "status_code": response.status_code})
+
+
+def create_timing():
+    """
+    Returns a new INERTIA_TIMING_COLLECTOR, or None if timing is disabled
+    """
+    collector_class = get_timing_collector_class()
+    return collector_class() if collector_class is not None else None
+
+
+def get_timing(request):
+    inertia = getattr(request, "inertia", None)
+    return getattr(inertia, "timing", None)
+
+
+def measure(timing, name):
+    """
+    Measures the block with the collector if there is one
+    """
+    return timing.measure(name) if timing is not None else nullcontext()
@@ -46,6 +46,15 @@ def is_class(string):
 
 
 if __name__ == "__main__":
+    try:
+        sys.argv.remove('--bench')
+    except ValueError:
+        pass
+    else:
+        # `runtests.py --bench [benchmark args]`
+        from benchmarks.__main__ import main as bench_main
+        sys.exit(bench_main(sys.argv[1:]))
+
     try:
         sys.argv.remove('--nolint')
     except ValueError:
@@ -0,0 +1,119 @@
+import json
+import logging
+
+import pytest
+from django.test import TestCase, override_settings
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from drf_inertia.budget import encode_page
+from drf_inertia.config import get_payload_budget
+from drf_inertia.decorators import inertia
+from drf_inertia.encoders import encode
+from drf_inertia.exceptions import PayloadBudgetExceeded
+
+factory = APIRequestFactory()
+reports = []
+
+
+def record(request, report):
+    reports.append(report)
+
+
+def get(data, **extra):
+    @inertia("Component/Path")
+    @api_view(["GET"])
+    def view(request):
+        return Response(data=data)
+
+    extra.setdefault("HTTP_X_INERTIA", True)
+    response = view(factory.get('/page', **extra))
+    response.render()
+    return response
+
+
+DATA = {"small": "a", "medium": "b" * 100, "large": ["c" * 100] * 10}
+
+
+class EncodePageTestCase(TestCase):
+    def test_encode_page(self):
+        page = {"component": "props", "props": {"a": {"props": {}}, "b": [1, " "], 1: None},
+                "version": "1", "url": "/"}
+        content, sizes = encode_page(page)
+        assert content == encode(page)
+        assert sizes == {"a": len(b'{"props":{}}'), "b": len(encode([1, " "])), "1": 4}
+
+    @override_settings(REST_FRAMEWORK={"COMPACT_JSON": False})
+    def test_encode_page_not_compact(self):
+        page = {"component": "A", "props": {"a": {"b": 1}, "c": [1, 2]}, "version": "1", "url": "/"}
+        content, sizes = encode_page(page)
+        assert content == encode(page)
+        assert b'"props": {"a": {"b": 1}, "c": [1, 2]}' in content
+        assert sizes == {"a": len(b'{"b": 1}'), "c": len(b'[1, 2]')}
+
+    def test_encode_empty_page(self):
+        page = {"component": "A", "props": {}, "version": "1", "url": "/"}
+        assert encode_page(page) == (encode(page), {})
+
+
+class PayloadBudgetTestCase(TestCase):
+    def setUp(self):
+        reports.clear()
+
+    def test_no_budget(self):
+        assert get_payload_budget() is None
+
+    @override_settings(INERTIA_PAYLOAD_BUDGET=100000)
+    def test_under_budget(self):
+        with self.assertNoLogs("drf_inertia.budget"):
+            response = get(DATA)
+        assert json.loads(response.content)["props"]["large"] == DATA["large"]
+
+    @override_settings(INERTIA_PAYLOAD_BUDGET=100000, REST_FRAMEWORK={"COMPACT_JSON": False})
+    def test_not_compact(self):
+        response = get(DATA)
+        assert json.loads(response.content)["props"] == dict(DATA, errors={}, flash={})
+
+    @override_settings(INERTIA_PAYLOAD_BUDGET=500)
+    def test_over_total_budget(self):
+        with self.assertLogs("drf_inertia.budget", logging.WARNING) as logs:
+            response = get(DATA)
+
+        assert json.loads(response.content)["props"]["small"] == "a"
+        [record] = logs.records
+        assert record.getMessage().startswith(
+            "GET /page is over its payload budget (total): %d bytes, largest props: large (1031), medium (102)"
+            % len(response.content))
+        assert record.inertia_payload.exceeded == ["total"]
+
+    @override_settings(INERTIA_PROP_BUDGET={"medium": 50}, INERTIA_PAYLOAD_BUDGET_RAISE=True)
+    def test_over_prop_budget_raises(self):
+        get({"large": DATA["large"]})
+        with pytest.raises(PayloadBudgetExceeded, match=r"over its payload budget \(medium\)"):
+            get(DATA)
+
+    @override_settings(INERTIA_PROP_BUDGET=50, INERTIA_PAYLOAD_BUDGET_RAISE=True)
+    def test_every_prop_budget(self):
+        with pytest.raises(PayloadBudgetExceeded, match=r"over its payload budget \(medium, large\)"):
+            get(DATA)
+
+    @override_settings(INERTIA_PAYLOAD_CALLBACK='tests.test_budget.record')
+    def test_callback(self):
+        response = get(DATA)
+
+        [report] = reports
+        assert report.total == len(response.content)
+        assert report.exceeded == []
+        assert report.largest(2) == [("large", 1031), ("medium", 102)]
+        assert set(report.sizes) == {"small", "medium", "large", "errors", "flash"}
+
+    @override_settings(INERTIA_PAYLOAD_CALLBACK='tests.test_budget.record', TEMPLATES=[{
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'OPTIONS': {'loaders': [('django.template.loaders.locmem.Loader', {'index.html': '{{ inertia_json|safe }}'})]},
+    }])
+    def test_html_pages_are_measured(self):
+        response = get(DATA, HTTP_X_INERTIA=False, HTTP_ACCEPT="text/html")
+        [report] = reports
+        assert report.total == len(response.content)
+        assert json.loads(response.content)["props"]["medium"] == DATA["medium"]
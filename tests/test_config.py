@@ -0,0 +1,67 @@
+import hashlib
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+from rest_framework import serializers
+
+from drf_inertia import config
+from drf_inertia.exceptions import DefaultExceptionHandler
+from drf_inertia.serializers import DefaultSharedSerializer
+
+
+class OtherSharedSerializer(serializers.Serializer):
+    pass
+
+
+class RegistryTestCase(TestCase):
+    def test_shared_serializer_class_is_resolved(self):
+        assert config.get_shared_serializer_class() is DefaultSharedSerializer
+
+    def test_exception_handler_is_singleton(self):
+        handler = config.get_exception_handler()
+        assert isinstance(handler, DefaultExceptionHandler)
+        assert config.get_exception_handler() is handler
+
+    def test_registry_cleared_when_settings_change(self):
+        assert config.get_shared_serializer_class() is DefaultSharedSerializer
+        with override_settings(INERTIA_SHARED_SERIALIZER='tests.test_config.OtherSharedSerializer'):
+            assert config.get_shared_serializer_class() is OtherSharedSerializer
+        assert config.get_shared_serializer_class() is DefaultSharedSerializer
+
+
+class AssetVersionTestCase(TestCase):
+    def test_static_version(self):
+        assert config.AssetVersion("1.2.3", 5).get() == "1.2.3"
+
+    def test_callable_is_cached_for_check_interval(self):
+        versions = iter(["1", "2"])
+        asset_version = config.AssetVersion(lambda: next(versions), 60)
+        assert asset_version.get() == "1"
+        assert asset_version.get() == "1"
+        asset_version.checked_at -= 60
+        assert asset_version.get() == "2"
+
+    def test_manifest_is_hashed_when_modified(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "manifest.json")
+            with open(path, "w") as manifest:
+                manifest.write('{"app.js": "app.123.js"}')
+
+            asset_version = config.AssetVersion(path, 0)
+            version = asset_version.get()
+            assert version == hashlib.md5(b'{"app.js": "app.123.js"}').hexdigest()
+            assert asset_version.get() == version
+
+            with open(path, "w") as manifest:
+                manifest.write('{"app.js": "app.456.js"}')
+            os.utime(path, ns=(asset_version.mtime + 1000, asset_version.mtime + 1000))
+            assert asset_version.get() != version
+
+    def test_missing_manifest_is_unversioned(self):
+        assert config.AssetVersion("/does/not/exist/manifest.json", 0).get() == "unversioned"
+
+    def test_get_version_uses_setting(self):
+        assert config.get_version() == "unversioned"
+        with override_settings(INERTIA_VERSION=lambda: 42):
+            assert config.get_version() == "42"
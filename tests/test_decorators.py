@@ -1,4 +1,6 @@
 import json
+
+import pytest
 from django.test import TestCase
 from django.db import models
 from rest_framework.decorators import api_view
@@ -9,7 +11,7 @@ from rest_framework.viewsets import GenericViewSet
 from rest_framework.exceptions import ValidationError
 from rest_framework import serializers
 
-from drf_inertia.decorators import inertia, component
+from drf_inertia.decorators import inertia, component, get_components
 from drf_inertia.exceptions import set_error_redirect
 
 
@@ -89,6 +91,27 @@ class DecoratorTestCase(TestCase):
         assert response['Content-Type'] == "application/json"
         assert response['X-Inertia'] == "true"
 
+    def test_component_method_decorated_subclass(self):
+        @inertia("Base/Default")
+        class BaseView(APIView):
+            def get(self, request, **kwargs):
+                return Response(data={})
+
+            def post(self, request, **kwargs):
+                return Response(data={})
+
+        class ChildView(BaseView):
+            @component("Child/Get")
+            def get(self, request, **kwargs):
+                return Response(data={})
+
+        response = ChildView.as_view()(self.factory.get('/', HTTP_X_INERTIA=True))
+        assert json.loads(response.rendered_content)["component"] == "Child/Get"
+        response = ChildView.as_view()(self.factory.post('/', HTTP_X_INERTIA=True))
+        assert json.loads(response.rendered_content)["component"] == "Base/Default"
+        response = BaseView.as_view()(self.factory.get('/', HTTP_X_INERTIA=True))
+        assert json.loads(response.rendered_content)["component"] == "Base/Default"
+
     def test_viewset_decorated(self):
         @inertia("Action/List")
         class ActionViewSet(GenericViewSet):
@@ -145,6 +168,7 @@ class DecoratorTestCase(TestCase):
         assert response.status_code == 302
         assert "errors" in request.session
         assert response["Location"] == "/"
+        assert response.cookies["inertia_errors"].value == "1"
 
     def test_decorated_api_view_handles_serializer_error(self):
         @inertia("Component/Path")
@@ -174,3 +198,39 @@ class DecoratorTestCase(TestCase):
         assert response.status_code == 302
         assert "errors" in request.session
         assert response["Location"] == "/error/redirect"
+
+    def test_component_method_decorated_viewset(self):
+        class BaseViewSet(GenericViewSet):
+            queryset = Action.objects.all()
+
+            @component("Action/Base")
+            def list(self, request, *args, **kwargs):
+                return Response(data={})
+
+            @component("Action/Detail")
+            def retrieve(self, request, *args, **kwargs):
+                return Response(data={})
+
+        @inertia("Action/List", retrieve="Action/Ignored")
+        class ActionViewSet(BaseViewSet):
+            def list(self, request, *args, **kwargs):
+                return Response(data={})
+
+        request = self.factory.get('/', HTTP_X_INERTIA=True)
+        response = ActionViewSet.as_view({'get': 'list'})(request)
+        assert json.loads(response.rendered_content)["component"] == "Action/List"
+
+        request = self.factory.get('/', HTTP_X_INERTIA=True)
+        response = ActionViewSet.as_view({'get': 'retrieve'})(request, pk=1)
+        assert json.loads(response.rendered_content)["component"] == "Action/Detail"
+
+    def test_component_map(self):
+        class TestView(APIView):
+            @component("Component/Get")
+            def get(self, request, **kwargs):
+                pass
+
+        components = get_components(TestView, {"POST": "Component/Post"})
+        assert components == {"get": "Component/Get", "GET": "Component/Get", "POST": "Component/Post"}
+        with pytest.raises(TypeError):
+            components["get"] = "Component/Other"
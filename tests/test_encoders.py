@@ -0,0 +1,121 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+from drf_inertia import config
+from drf_inertia.encoders import JSONBackend, OrjsonBackend, UjsonBackend
+
+
+PAGE = {
+    "component": "Users/List",
+    "props": {
+        "users": [{
+            "id": 1,
+            "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "joined": datetime.datetime(2020, 1, 2, 3, 4, 5, 123456, tzinfo=datetime.timezone.utc),
+            "birthday": datetime.date(1990, 5, 6),
+            "balance": Decimal("10.25"),
+            "name": "Jörg \u2028 </script>",
+            "tags": ("a", "b"),
+        }],
+        "counts": {1: "one"},
+        "today": timezone.now().date(),
+    },
+    "url": "/users",
+    "version": "unversioned",
+}
+
+
+@pytest.mark.parametrize("backend_class", [JSONBackend, OrjsonBackend, UjsonBackend])
+def test_backend_matches_rest_framework(backend_class):
+    if not backend_class.available:
+        pytest.skip("%s is not installed" % backend_class.__name__)
+
+    assert backend_class().encode(PAGE) == JSONRenderer().render(PAGE)
+    assert backend_class().dumps(PAGE) == JSONRenderer().render(PAGE).decode()
+
+
+class JSONBackendSettingTestCase(TestCase):
+    def test_default_backend(self):
+        assert type(config.get_json_backend()) is JSONBackend
+
+    @override_settings(INERTIA_JSON_BACKEND='orjson')
+    def test_backend_by_name(self):
+        if not OrjsonBackend.available:
+            pytest.skip("orjson is not installed")
+        assert type(config.get_json_backend()) is OrjsonBackend
+
+    @override_settings(INERTIA_JSON_BACKEND='tests.test_encoders.MissingBackend')
+    def test_missing_backend_falls_back_to_json(self):
+        with pytest.warns(UserWarning):
+            assert type(config.get_json_backend()) is JSONBackend
+
+
+class MissingBackend(JSONBackend):
+    available = False
+
+
+class CustomEncoder(encoders.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, datetime.datetime):
+            return "custom"
+        return super(CustomEncoder, self).default(obj)
+
+
+@override_settings(INERTIA_JSON_ENCODER='tests.test_encoders.CustomEncoder')
+@pytest.mark.parametrize("backend_class", [JSONBackend, OrjsonBackend, UjsonBackend])
+def test_backend_uses_custom_encoder(backend_class):
+    if not backend_class.available:
+        pytest.skip("%s is not installed" % backend_class.__name__)
+
+    assert backend_class().dumps({"date": datetime.datetime(2020, 1, 1)}) == '{"date":"custom"}'
+
+
+BACKENDS = [JSONBackend, OrjsonBackend, UjsonBackend]
+
+
+@pytest.mark.parametrize("backend_class", BACKENDS)
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), Decimal("NaN")])
+def test_non_finite_floats_raise(backend_class, value):
+    if not backend_class.available:
+        pytest.skip("%s is not installed" % backend_class.__name__)
+
+    with pytest.raises(ValueError):
+        backend_class().encode({"props": {"x": value, "y": None}})
+
+
+@override_settings(REST_FRAMEWORK={"STRICT_JSON": False})
+@pytest.mark.parametrize("backend_class", BACKENDS)
+def test_non_finite_floats_not_strict(backend_class):
+    if not backend_class.available:
+        pytest.skip("%s is not installed" % backend_class.__name__)
+
+    data = {"x": float("nan"), "y": float("inf"), "z": None}
+    assert backend_class().encode(data) == b'{"x":NaN,"y":Infinity,"z":null}'
+
+
+@pytest.mark.parametrize("backend_class", BACKENDS)
+@pytest.mark.parametrize("setting,attribute", [("UNICODE_JSON", "ensure_ascii"), ("COMPACT_JSON", "compact")])
+def test_backend_matches_rest_framework_settings(backend_class, setting, attribute):
+    if not backend_class.available:
+        pytest.skip("%s is not installed" % backend_class.__name__)
+
+    # JSONRenderer reads the settings when it is imported
+    renderer = JSONRenderer()
+    setattr(renderer, attribute, not getattr(renderer, attribute))
+    with override_settings(REST_FRAMEWORK={setting: False}):
+        assert backend_class().encode(PAGE) == renderer.render(PAGE)
+
+
+@pytest.mark.parametrize("backend_class", BACKENDS)
+def test_large_integers(backend_class):
+    if not backend_class.available:
+        pytest.skip("%s is not installed" % backend_class.__name__)
+
+    assert backend_class().encode({"n": 2 ** 70}) == b'{"n":1180591620717411303424}'
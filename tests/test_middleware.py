@@ -0,0 +1,40 @@
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from drf_inertia.middleware import InertiaVersionMiddleware
+
+factory = APIRequestFactory()
+
+
+@override_settings(INERTIA_VERSION="2")
+class InertiaVersionMiddlewareTestCase(TestCase):
+    def setUp(self):
+        self.calls = 0
+
+        def get_response(request):
+            self.calls += 1
+            return HttpResponse("page")
+
+        self.middleware = InertiaVersionMiddleware(get_response)
+
+    def test_stale_visit_is_a_conflict(self):
+        response = self.middleware(factory.get('/users?page=2', HTTP_X_INERTIA=True, HTTP_X_INERTIA_VERSION="1"))
+        assert self.calls == 0
+        assert response.status_code == 409
+        assert response["X-Inertia-Location"] == "/users?page=2"
+        assert response.content == b""
+
+    def test_current_version(self):
+        response = self.middleware(factory.get('/users', HTTP_X_INERTIA=True, HTTP_X_INERTIA_VERSION="2"))
+        assert self.calls == 1
+        assert response.status_code == 200
+
+    def test_requests_without_version(self):
+        self.middleware(factory.get('/users', HTTP_X_INERTIA=True))
+        self.middleware(factory.get('/users', HTTP_X_INERTIA_VERSION="1"))
+        assert self.calls == 2
+
+    def test_only_get_requests(self):
+        self.middleware(factory.post('/users', HTTP_X_INERTIA=True, HTTP_X_INERTIA_VERSION="1"))
+        assert self.calls == 1
@@ -1,10 +1,17 @@
+import datetime
+from decimal import Decimal
+
 import pytest
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
+from rest_framework import views
+from rest_framework.decorators import api_view
 from rest_framework.request import Request
+from rest_framework.response import Response
 from rest_framework.test import APIRequestFactory
 from rest_framework.renderers import JSONRenderer, TemplateHTMLRenderer
 
+from drf_inertia.decorators import inertia
 from drf_inertia.negotiation import Inertia, InertiaNegotiation, InertiaJSONRenderer, InertiaHTMLRenderer
 from drf_inertia.exceptions import Conflict
 
@@ -12,10 +19,12 @@ factory = APIRequestFactory()
 
 
 class MockInertia(Inertia):
-    is_data = True
-    component = "Test/Component"
-    url = "/"
-    version = "unversioned"
+    def __init__(self, **kwargs):
+        kwargs.setdefault("is_data", True)
+        kwargs.setdefault("component", "Test/Component")
+        kwargs.setdefault("url", "/")
+        kwargs.setdefault("version", "unversioned")
+        super(MockInertia, self).__init__(**kwargs)
 
 
 class TestInertia(TestCase):
@@ -40,7 +49,20 @@ class TestInertia(TestCase):
             HTTP_X_INERTIA_PARTIAL_COMPONENT=component))
         inertia = Inertia.from_request(request, component)
         assert inertia.is_data
-        assert inertia.partial_data == ['prop1', 'prop2']
+        assert inertia.partial_data == frozenset(['prop1', 'prop2'])
+
+    def test_data_is_not_shared(self):
+        first, second = Inertia(), MockInertia()
+        first.data["prop"] = 1
+        assert second.data == {}
+        assert not hasattr(first, "__dict__")
+
+    def test_include(self):
+        assert Inertia().include("prop1")
+        inertia = Inertia(partial_data=["prop1", "prop2.nested"])
+        assert inertia.include("prop1")
+        assert inertia.include("prop2")
+        assert not inertia.include("prop3")
 
     def test_from_request_raises_conflict(self):
         request = Request(factory.get('/', HTTP_X_INERTIA=True, HTTP_X_INERTIA_VERSION="1.2.4"))
@@ -84,3 +106,128 @@ class TestInertiaNegotiation(TestCase):
         renderer, media_type = self.select_renderer(request)
         assert media_type == "text/html"
         assert isinstance(renderer, InertiaHTMLRenderer)
+
+
+@override_settings(TEMPLATES=[{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'OPTIONS': {
+        'loaders': [('django.template.loaders.locmem.Loader', {
+            'index.html': '<div id="app" data-page="{{ inertia_json }}"></div>',
+        })],
+    },
+}])
+class TestInertiaHTMLRenderer(TestCase):
+    def render(self, data):
+        @inertia("Component/Path")
+        @api_view(["GET"])
+        def view(request):
+            return Response(data=data)
+
+        response = view(factory.get('/', HTTP_ACCEPT="text/html"))
+        return response.rendered_content.decode()
+
+    def test_page_is_escaped_json(self):
+        content = self.render({"title": "<b>\"Hi\" & bye</b>"})
+        assert content.startswith('<div id="app" data-page="{&quot;component&quot;:')
+        assert "&lt;b&gt;\\&quot;Hi\\&quot; &amp; bye&lt;/b&gt;" in content
+
+    def test_page_encodes_rest_framework_types(self):
+        content = self.render({"price": Decimal("1.50"), "date": datetime.date(2020, 1, 2)})
+        assert "&quot;price&quot;:1.5" in content
+        assert "&quot;date&quot;:&quot;2020-01-02&quot;" in content
+
+    def test_template_is_cached(self):
+        renderer = InertiaHTMLRenderer()
+        template = renderer.resolve_template(["index.html"])
+        assert renderer.resolve_template(["index.html"]) is template
+
+
+class DRFExceptionHandler(object):
+    def handle(self, exc, context):
+        return views.exception_handler(exc, context)
+
+
+class TestETag(TestCase):
+    def setUp(self):
+        self.built = 0
+
+        @inertia("Component/Path")
+        @api_view(["GET"])
+        def view(request):
+            request.inertia.check_not_modified(request, request.GET.get("updated", ""))
+            self.built += 1
+            return Response(data={"items": [1, 2, 3]})
+
+        @inertia("Component/Path")
+        @api_view(["GET"])
+        def page(request):
+            return Response(data={"items": [1, 2, 3], "other": "other"})
+
+        self.view = view
+        self.page = page
+
+    def test_response_has_etag(self):
+        response = self.page(factory.get('/', HTTP_X_INERTIA=True))
+        response.render()
+        assert response.status_code == 200
+        assert response["ETag"].startswith('"')
+        assert "X-Inertia" in response["Vary"]
+
+    @override_settings(INERTIA_ETAG=False)
+    def test_etag_disabled(self):
+        response = self.page(factory.get('/', HTTP_X_INERTIA=True))
+        response.render()
+        assert not response.has_header("ETag")
+
+    def test_matching_etag_is_not_modified(self):
+        response = self.page(factory.get('/', HTTP_X_INERTIA=True))
+        response.render()
+        response = self.page(factory.get('/', HTTP_X_INERTIA=True, HTTP_IF_NONE_MATCH=response["ETag"]))
+        response.render()
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_partial_reload_has_different_etag(self):
+        full = self.page(factory.get('/', HTTP_X_INERTIA=True))
+        full.render()
+        partial = self.page(factory.get(
+            '/', HTTP_X_INERTIA=True, HTTP_IF_NONE_MATCH=full["ETag"],
+            HTTP_X_INERTIA_PARTIAL_DATA="items", HTTP_X_INERTIA_PARTIAL_COMPONENT="Component/Path"))
+        partial.render()
+        assert partial.status_code == 200
+        assert partial["ETag"] != full["ETag"]
+
+    def test_non_inertia_response_has_no_etag(self):
+        response = self.page(factory.get('/', HTTP_ACCEPT="application/json"))
+        response.render()
+        assert not response.has_header("ETag")
+
+    def test_validator_skips_view(self):
+        response = self.view(factory.get('/?updated=1', HTTP_X_INERTIA=True))
+        response.render()
+        etag = response["ETag"]
+
+        response = self.view(factory.get('/?updated=1', HTTP_X_INERTIA=True, HTTP_IF_NONE_MATCH=etag))
+        response.render()
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+        assert response.content == b""
+        assert self.built == 1
+
+        response = self.view(factory.get('/?updated=2', HTTP_X_INERTIA=True, HTTP_IF_NONE_MATCH=etag))
+        response.render()
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+        assert self.built == 2
+
+    @override_settings(INERTIA_EXCEPTION_HANDLER='tests.test_negotiation.DRFExceptionHandler')
+    def test_validator_with_custom_exception_handler(self):
+        response = self.view(factory.get('/?updated=1', HTTP_X_INERTIA=True))
+        response.render()
+
+        etag = response["ETag"]
+        response = self.view(factory.get('/?updated=1', HTTP_X_INERTIA=True, HTTP_IF_NONE_MATCH=etag))
+        response.render()
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+        assert response.content == b""
@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import TestCase, override_settings
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from drf_inertia.cache import get_cache
+from drf_inertia.decorators import inertia
+from drf_inertia.page_cache import invalidate_pages
+
+factory = APIRequestFactory()
+
+
+@override_settings(TEMPLATES=[{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'OPTIONS': {
+        'loaders': [('django.template.loaders.locmem.Loader', {
+            'index.html': '<div id="app" data-page="{{ inertia_json }}"></div>',
+        })],
+    },
+}])
+class PageCacheTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.calls = 0
+
+        @inertia("Docs/Page", cache_timeout=60, cache_tags=["docs"])
+        @api_view(["GET"])
+        def view(request):
+            self.calls += 1
+            return Response(data={"calls": self.calls})
+
+        self.view = view
+
+    def get(self, path='/docs', **extra):
+        extra.setdefault("HTTP_ACCEPT", "text/html")
+        response = self.view(factory.get(path, **extra))
+        if hasattr(response, "render"):
+            response.render()
+        return response
+
+    def test_anonymous_html_page_is_cached(self):
+        first = self.get()
+        second = self.get()
+        assert self.calls == 1
+        assert second.status_code == 200
+        assert second.content == first.content
+        assert second["Content-Type"] == first["Content-Type"]
+
+    def test_pages_are_cached_per_url(self):
+        self.get('/docs?page=1')
+        self.get('/docs?page=2')
+        assert self.calls == 2
+
+    def test_inertia_requests_are_not_cached(self):
+        self.get(HTTP_X_INERTIA=True)
+        self.get(HTTP_X_INERTIA=True)
+        assert self.calls == 2
+
+    def test_invalidate_pages(self):
+        self.get()
+        invalidate_pages("other")
+        self.get()
+        assert self.calls == 1
+        invalidate_pages("docs")
+        self.get()
+        assert self.calls == 2
+
+    def test_version_change_bypasses_cache(self):
+        self.get()
+        with override_settings(INERTIA_VERSION="2"):
+            self.get()
+        assert self.calls == 2
+
+    def test_flash_messages_bypass_cache(self):
+        self.get()
+        request = factory.get('/docs', HTTP_ACCEPT="text/html")
+        request.COOKIES["messages"] = "flash"
+        request._messages = CookieStorage(request)
+        self.view(request)
+        assert self.calls == 2
+
+    def test_authenticated_users_bypass_cache(self):
+        self.get()
+        request = factory.get('/docs', HTTP_ACCEPT="text/html")
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = "session"
+        request.user = User.objects.create(username="user")
+        self.view(request).render()
+        assert self.calls == 2
+
+        request.user = AnonymousUser()
+        self.view(request)
+        assert self.calls == 2
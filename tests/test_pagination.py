@@ -0,0 +1,76 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework import generics, serializers
+from rest_framework.test import APIRequestFactory
+
+from drf_inertia.decorators import inertia
+from drf_inertia.pagination import CursorPagination, PageNumberPagination
+
+factory = APIRequestFactory()
+
+
+class UsernameSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ["username"]
+
+
+class PagePagination(PageNumberPagination):
+    page_size = 2
+
+
+class UsernameCursorPagination(CursorPagination):
+    page_size = 2
+    ordering = "id"
+
+
+def list_view(pagination):
+    @inertia("Users/List")
+    class UserList(generics.ListAPIView):
+        queryset = User.objects.order_by("id")
+        serializer_class = UsernameSerializer
+        pagination_class = pagination
+
+    return UserList.as_view()
+
+
+class PaginationTestCase(TestCase):
+    def setUp(self):
+        User.objects.bulk_create(User(username="user%d" % i) for i in range(5))
+
+    def get_page(self, view, path, **headers):
+        response = view(factory.get(path, HTTP_X_INERTIA=True, **headers))
+        return json.loads(response.rendered_content)
+
+    def test_page_number_results_are_merged(self):
+        page = self.get_page(
+            list_view(PagePagination), '/users?page=2',
+            HTTP_X_INERTIA_PARTIAL_DATA="results,next", HTTP_X_INERTIA_PARTIAL_COMPONENT="Users/List")
+
+        assert page["props"] == {
+            "results": [{"username": "user2"}, {"username": "user3"}],
+            "next": "http://testserver/users?page=3",
+        }
+        assert page["mergeProps"] == ["results"]
+
+    def test_cursor_results_are_merged(self):
+        view = list_view(UsernameCursorPagination)
+        first = self.get_page(view, '/users')
+        assert first["props"]["results"] == [{"username": "user0"}, {"username": "user1"}]
+        assert first["mergeProps"] == ["results"]
+
+        second = self.get_page(view, first["props"]["next"])
+        assert second["props"]["results"] == [{"username": "user2"}, {"username": "user3"}]
+
+    def test_reset(self):
+        page = self.get_page(list_view(PagePagination), '/users', HTTP_X_INERTIA_RESET="results")
+        assert page["props"]["count"] == 5
+        assert "mergeProps" not in page
+
+    def test_other_renderers_paginate_as_usual(self):
+        response = list_view(PagePagination)(factory.get('/users', HTTP_ACCEPT="application/json"))
+        data = json.loads(response.rendered_content)
+        assert data["results"] == [{"username": "user0"}, {"username": "user1"}]
+        assert data["count"] == 5
@@ -0,0 +1,155 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework import views
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from drf_inertia.cache import get_cache
+from drf_inertia.decorators import inertia
+from drf_inertia.negotiation import Inertia
+from drf_inertia.prefetch import invalidate_prefetched
+
+factory = APIRequestFactory()
+
+
+class DRFExceptionHandler(object):
+    def handle(self, exc, context):
+        return views.exception_handler(exc, context)
+
+
+@override_settings(INERTIA_PREFETCH_CACHE_TIMEOUT=30)
+class PrefetchTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.calls = 0
+        self.user = User.objects.create(username="jane")
+
+        @inertia("Users/Detail")
+        @api_view(["GET", "POST"])
+        def view(request):
+            self.calls += 1
+            return Response(data={"calls": self.calls})
+
+        self.view = view
+
+    def request(self, method="get", path="/users/1", user=None, prefetch=False, **extra):
+        extra.setdefault("HTTP_X_INERTIA", True)
+        if prefetch:
+            extra["HTTP_PURPOSE"] = "prefetch"
+
+        request = getattr(factory, method)(path, **extra)
+        force_authenticate(request, user=user or self.user)
+        response = self.view(request)
+        if hasattr(response, "render"):
+            response.render()
+        return response
+
+    def test_from_request(self):
+        request = factory.get('/users/1', HTTP_X_INERTIA=True, HTTP_PURPOSE="prefetch")
+        assert Inertia.from_request(request, "Users/Detail").prefetch
+        request = factory.get('/users/1', HTTP_X_INERTIA=True)
+        assert not Inertia.from_request(request, "Users/Detail").prefetch
+        request = factory.get('/users/1', HTTP_PURPOSE="prefetch")
+        assert not Inertia.from_request(request, "Users/Detail").prefetch
+
+    def test_visit_is_served_from_prefetch(self):
+        prefetched = self.request(prefetch=True)
+        response = self.request()
+        assert self.calls == 1
+        assert response.status_code == 200
+        assert response.content == prefetched.content
+        assert response["X-Inertia"] == "true"
+        assert response["Content-Type"] == prefetched["Content-Type"]
+        assert json.loads(response.content)["props"]["calls"] == 1
+
+    @override_settings(INERTIA_EXCEPTION_HANDLER='tests.test_prefetch.DRFExceptionHandler')
+    def test_custom_exception_handler(self):
+        prefetched = self.request(prefetch=True)
+        response = self.request()
+        assert self.calls == 1
+        assert response.content == prefetched.content
+
+    def test_prefetch_is_used_once(self):
+        self.request(prefetch=True)
+        self.request()
+        response = self.request()
+        assert self.calls == 2
+        assert json.loads(response.content)["props"]["calls"] == 2
+
+    def test_visits_are_not_cached(self):
+        self.request()
+        self.request()
+        assert self.calls == 2
+
+    def test_prefetches_are_per_user(self):
+        self.request(prefetch=True)
+        self.request(user=User.objects.create(username="john"))
+        assert self.calls == 2
+
+    def test_prefetches_are_per_url_and_partial_data(self):
+        self.request(prefetch=True)
+        self.request(path="/users/1?tab=posts")
+        self.request(HTTP_X_INERTIA_PARTIAL_DATA="calls", HTTP_X_INERTIA_PARTIAL_COMPONENT="Users/Detail")
+        assert self.calls == 3
+
+    def test_version_change_bypasses_prefetch(self):
+        self.request(prefetch=True)
+        with override_settings(INERTIA_VERSION="2"):
+            self.request()
+        assert self.calls == 2
+
+    def test_invalidate_user(self):
+        other = User.objects.create(username="john")
+        self.request(prefetch=True)
+        self.request(prefetch=True, user=other)
+        invalidate_prefetched(user=self.user)
+        self.request()
+        self.request(user=other)
+        assert self.calls == 3
+
+    def test_invalidate_all(self):
+        self.request(prefetch=True)
+        invalidate_prefetched()
+        self.request()
+        assert self.calls == 2
+
+    def test_mutation_invalidates_prefetches(self):
+        self.request(prefetch=True)
+        self.request(method="post")
+        self.request()
+        assert self.calls == 3
+
+    def test_anonymous_requests_are_not_cached(self):
+        request = factory.get('/users/1', HTTP_X_INERTIA=True, HTTP_PURPOSE="prefetch")
+        self.view(request).render()
+        self.view(factory.get('/users/1', HTTP_X_INERTIA=True)).render()
+        assert self.calls == 2
+
+    @override_settings(INERTIA_PREFETCH_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        self.request(prefetch=True)
+        self.request()
+        assert self.calls == 2
+
+
+class PrefetchDisabledTestCase(TestCase):
+    def test_disabled_by_default(self):
+        user = User.objects.create(username="jane")
+
+        @inertia("Users/Detail")
+        @api_view(["GET", "POST"])
+        def view(request):
+            return Response(data={})
+
+        with mock.patch("drf_inertia.prefetch.get_cache") as get_cache, \
+                mock.patch("drf_inertia.prefetch.bump_versions") as bump_versions:
+            for method in ("get", "post"):
+                request = getattr(factory, method)('/users/1', HTTP_X_INERTIA=True, HTTP_PURPOSE="prefetch")
+                force_authenticate(request, user=user)
+                view(request).render()
+        assert not get_cache.called
+        assert not bump_versions.called
@@ -0,0 +1,375 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.http import Http404
+from django.test import TestCase
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from drf_inertia.decorators import inertia
+from drf_inertia.negotiation import Inertia
+from drf_inertia.props import DeferredProp, LazyProp, MergeProp, get_partial_tree
+
+
+class LazyPropTestCase(TestCase):
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.calls = []
+
+        def prop(name):
+            def callback():
+                self.calls.append(name)
+                return name
+            return callback
+
+        @inertia("Component/Path")
+        @api_view(["GET"])
+        def view(request):
+            return Response(data={
+                "eager": "eager",
+                "lazy": LazyProp(prop("lazy")),
+                "optional": Inertia.lazy(prop("optional")),
+            })
+
+        self.view = view
+
+    def get_props(self, **headers):
+        request = self.factory.get('/', HTTP_X_INERTIA=True, **headers)
+        response = self.view(request)
+        return json.loads(response.rendered_content)["props"]
+
+    def test_full_visit_resolves_lazy_but_not_optional(self):
+        props = self.get_props()
+        assert props["eager"] == "eager"
+        assert props["lazy"] == "lazy"
+        assert "optional" not in props
+        assert self.calls == ["lazy"]
+
+    def test_partial_reload_only_resolves_requested_props(self):
+        props = self.get_props(
+            HTTP_X_INERTIA_PARTIAL_DATA="optional",
+            HTTP_X_INERTIA_PARTIAL_COMPONENT="Component/Path")
+        assert props["optional"] == "optional"
+        assert "lazy" not in props
+        assert self.calls == ["optional"]
+
+    def test_partial_reload_for_other_component_is_full_visit(self):
+        props = self.get_props(
+            HTTP_X_INERTIA_PARTIAL_DATA="optional",
+            HTTP_X_INERTIA_PARTIAL_COMPONENT="Component/Other")
+        assert props["lazy"] == "lazy"
+        assert "optional" not in props
+        assert self.calls == ["lazy"]
+
+
+    def test_api_request_resolves_props_like_full_visit(self):
+        def get_data():
+            return {
+                "eager": "eager",
+                "lazy": LazyProp(lambda: "lazy"),
+                "optional": Inertia.lazy(lambda: "optional"),
+                "deferred": DeferredProp(lambda: "deferred"),
+                "merged": MergeProp([1, 2]),
+            }
+
+        @inertia("Component/Path")
+        @api_view(["GET"])
+        def view(request):
+            return Response(data=get_data())
+
+        expected = {"eager": "eager", "lazy": "lazy", "merged": [1, 2]}
+        response = view(self.factory.get('/', HTTP_ACCEPT="application/json"))
+        assert json.loads(response.rendered_content) == expected
+
+        adrf_views = pytest.importorskip("adrf.views")
+
+        @inertia("Component/Path")
+        class AsyncView(adrf_views.APIView):
+            async def get(self, request, **kwargs):
+                return Response(data=get_data())
+
+        response = async_to_sync(AsyncView.as_view())(self.factory.get('/', HTTP_ACCEPT="application/json"))
+        assert json.loads(response.rendered_content) == expected
+
+
+class DeferredPropTestCase(TestCase):
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.calls = []
+
+        def prop(name):
+            def callback():
+                self.calls.append(name)
+                return name
+            return callback
+
+        @inertia("Component/Path")
+        @api_view(["GET"])
+        def view(request):
+            return Response(data={
+                "eager": "eager",
+                "stats": DeferredProp(prop("stats")),
+                "teams": Inertia.defer(prop("teams"), group="sidebar"),
+                "projects": Inertia.defer(prop("projects"), group="sidebar"),
+            })
+
+        self.view = view
+
+    def get_page(self, **headers):
+        request = self.factory.get('/', HTTP_X_INERTIA=True, **headers)
+        return json.loads(self.view(request).rendered_content)
+
+    def test_full_visit_lists_deferred_props(self):
+        page = self.get_page()
+        assert page["props"] == {"eager": "eager", "errors": {}, "flash": {}}
+        assert page["deferredProps"] == {"default": ["stats"], "sidebar": ["teams", "projects"]}
+        assert self.calls == []
+
+    def test_partial_reload_resolves_deferred_group(self):
+        page = self.get_page(
+            HTTP_X_INERTIA_PARTIAL_DATA="teams,projects",
+            HTTP_X_INERTIA_PARTIAL_COMPONENT="Component/Path")
+        assert page["props"] == {"teams": "teams", "projects": "projects"}
+        assert "deferredProps" not in page
+        assert self.calls == ["teams", "projects"]
+
+    def test_pages_without_deferred_props(self):
+        @inertia("Component/Path")
+        @api_view(["GET"])
+        def view(request):
+            return Response(data={"lazy": Inertia.lazy(lambda: 1)})
+
+        response = view(self.factory.get('/', HTTP_X_INERTIA=True))
+        assert "deferredProps" not in json.loads(response.rendered_content)
+
+
+class MergePropTestCase(TestCase):
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+        @inertia("Component/Path")
+        @api_view(["GET"])
+        def view(request):
+            return Response(data={
+                "posts": MergeProp([3, 4]),
+                "filters": Inertia.merge(lambda: {"tags": ["b"]}, deep=True),
+                "title": "Posts",
+            })
+
+        self.view = view
+
+    def get_page(self, **headers):
+        request = self.factory.get('/', HTTP_X_INERTIA=True, **headers)
+        return json.loads(self.view(request).rendered_content)
+
+    def test_merge_props_are_listed(self):
+        page = self.get_page()
+        assert page["props"]["posts"] == [3, 4]
+        assert page["props"]["filters"] == {"tags": ["b"]}
+        assert page["mergeProps"] == ["posts"]
+        assert page["deepMergeProps"] == ["filters"]
+
+    def test_partial_reload_lists_requested_merge_props(self):
+        page = self.get_page(
+            HTTP_X_INERTIA_PARTIAL_DATA="posts",
+            HTTP_X_INERTIA_PARTIAL_COMPONENT="Component/Path")
+        assert page["props"] == {"posts": [3, 4]}
+        assert page["mergeProps"] == ["posts"]
+        assert "deepMergeProps" not in page
+
+    def test_reset_props_are_not_merged(self):
+        page = self.get_page(HTTP_X_INERTIA_RESET="posts, filters")
+        assert page["props"]["posts"] == [3, 4]
+        assert "mergeProps" not in page
+        assert "deepMergeProps" not in page
+
+
+class PartialReloadTestCase(TestCase):
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+        @inertia("Component/Path")
+        @api_view(["GET"])
+        def view(request):
+            return Response(data={
+                "user": {"name": "Jane", "email": "jane@example.com", "teams": ["a", "b"]},
+                "notifications": [1, 2, 3],
+                "stats": LazyProp(lambda: {"count": 1, "total": 2}),
+            })
+
+        self.view = view
+
+    def get_props(self, only):
+        request = self.factory.get(
+            '/',
+            HTTP_X_INERTIA=True,
+            HTTP_X_INERTIA_PARTIAL_DATA=only,
+            HTTP_X_INERTIA_PARTIAL_COMPONENT="Component/Path")
+        response = self.view(request)
+        return json.loads(response.rendered_content)["props"]
+
+    def test_partial_reload_prunes_view_props(self):
+        props = self.get_props("notifications")
+        assert props == {"notifications": [1, 2, 3]}
+
+    def test_partial_reload_nested_keys(self):
+        props = self.get_props("user.name,stats.count")
+        assert props == {"user": {"name": "Jane"}, "stats": {"count": 1}}
+
+    def test_partial_reload_parent_includes_whole_prop(self):
+        props = self.get_props("user.name,user")
+        assert props["user"]["email"] == "jane@example.com"
+
+    def test_partial_reload_includes_requested_shared_data(self):
+        props = self.get_props("flash,user.email")
+        assert props == {"flash": {}, "user": {"email": "jane@example.com"}}
+
+    def test_partial_reload_error_data_is_not_pruned(self):
+        @inertia("Component/Path")
+        @api_view(["GET"])
+        def view(request):
+            if request.GET.get("status"):
+                return Response(data={"detail": "Unavailable."}, status=503)
+            raise Http404
+
+        for path, status_code in (('/', 404), ('/?status=503', 503)):
+            response = view(self.factory.get(
+                path, HTTP_X_INERTIA=True, HTTP_X_INERTIA_PARTIAL_DATA="stats",
+                HTTP_X_INERTIA_PARTIAL_COMPONENT="Component/Path"))
+            assert response.status_code == status_code
+            assert "detail" in json.loads(response.rendered_content)["props"]
+
+
+class GetPartialTreeTestCase(TestCase):
+    def test_get_partial_tree(self):
+        tree = get_partial_tree(["user.name", "user.email", "teams", "teams.name"])
+        assert tree == {"user": {"name": None, "email": None}, "teams": None}
+
+
+def concurrent_props():
+    """
+    Two async props that can only complete when they run concurrently
+    """
+    events = {}
+
+    def prop(name, other):
+        async def callback():
+            events.setdefault(name, asyncio.Event()).set()
+            await asyncio.wait_for(events.setdefault(other, asyncio.Event()).wait(), 1)
+            return name
+        return callback
+
+    return {"first": LazyProp(prop("first", "second")), "second": LazyProp(prop("second", "first"))}
+
+
+class AwaitablePropTestCase(TestCase):
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def test_sync_view_resolves_awaitable_props_concurrently(self):
+        @inertia("Component/Path")
+        @api_view(["GET"])
+        def view(request):
+            return Response(data=concurrent_props())
+
+        response = view(self.factory.get('/', HTTP_X_INERTIA=True))
+        props = json.loads(response.rendered_content)["props"]
+        assert props["first"] == "first"
+        assert props["second"] == "second"
+
+    def test_async_view_resolves_awaitable_props_concurrently(self):
+        adrf_views = pytest.importorskip("adrf.views")
+
+        @inertia("Component/Path")
+        class TestView(adrf_views.APIView):
+            async def get(self, request, **kwargs):
+                return Response(data=dict(concurrent_props(), optional=Inertia.lazy(lambda: 1)))
+
+        response = async_to_sync(TestView.as_view())(self.factory.get('/', HTTP_X_INERTIA=True))
+        assert response.data == {"first": "first", "second": "second"}
+        props = json.loads(response.rendered_content)["props"]
+        assert props["first"] == "first"
+        assert props["second"] == "second"
+
+
+    def test_async_view_resolves_sync_props_outside_event_loop(self):
+        adrf_views = pytest.importorskip("adrf.views")
+        User.objects.create(username="user")
+
+        @inertia("Component/Path")
+        class TestView(adrf_views.APIView):
+            async def get(self, request, **kwargs):
+                if request.inertia.partial_data:
+                    # nested lazy props are resolved while pruning
+                    return Response(data={"user": {"name": LazyProp(lambda: User.objects.get().username)}})
+
+                return Response(data={
+                    "count": LazyProp(lambda: User.objects.count()),
+                    "merged": MergeProp(lambda: list(User.objects.values_list("username", flat=True))),
+                    "values": MergeProp([1]),
+                })
+
+        response = async_to_sync(TestView.as_view())(self.factory.get('/', HTTP_X_INERTIA=True))
+        props = json.loads(response.rendered_content)["props"]
+        assert props["count"] == 1
+        assert props["merged"] == ["user"]
+        assert props["values"] == [1]
+
+        response = async_to_sync(TestView.as_view())(self.factory.get(
+            '/', HTTP_X_INERTIA=True, HTTP_X_INERTIA_PARTIAL_DATA="user.name",
+            HTTP_X_INERTIA_PARTIAL_COMPONENT="Component/Path"))
+        assert json.loads(response.rendered_content)["props"]["user"] == {"name": "user"}
+
+
+class ConcurrentPropTestCase(TestCase):
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def get_props(self, data):
+        @inertia("Component/Path")
+        @api_view(["GET"])
+        def view(request):
+            return Response(data=data)
+
+        response = view(self.factory.get('/', HTTP_X_INERTIA=True))
+        return json.loads(response.rendered_content)["props"]
+
+    def test_concurrent_props_run_on_thread_pool(self):
+        # each prop can only complete while the other is running
+        barrier = threading.Barrier(2, timeout=1)
+
+        def prop(name):
+            def callback():
+                barrier.wait()
+                return name
+            return LazyProp(callback, concurrent=True)
+
+        props = self.get_props({"first": prop("first"), "second": prop("second")})
+        assert props["first"] == "first"
+        assert props["second"] == "second"
+
+    def test_concurrent_prop_timeout_uses_fallback(self):
+        event = threading.Event()
+        props = self.get_props({
+            "slow": LazyProp(lambda: event.wait(1), concurrent=True, timeout=0.01, fallback="fallback"),
+        })
+        event.set()
+        assert props["slow"] == "fallback"
+
+    def test_awaitable_prop_timeout_uses_fallback(self):
+        async def slow():
+            await asyncio.sleep(1)
+
+        props = self.get_props({"slow": LazyProp(slow, timeout=0.01, fallback="fallback")})
+        assert props["slow"] == "fallback"
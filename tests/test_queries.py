@@ -0,0 +1,107 @@
+import logging
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from drf_inertia.decorators import inertia
+from drf_inertia.exceptions import QueryThresholdExceeded
+from drf_inertia.props import LazyProp
+from drf_inertia.queries import QueryCounter, normalize_sql
+from drf_inertia.serializers import DefaultSharedSerializer, SharedField
+
+factory = APIRequestFactory()
+
+
+def usernames():
+    # one query per user (N+1)
+    return [User.objects.get(pk=pk).username for pk in User.objects.values_list("pk", flat=True)]
+
+
+class UserCountField(SharedField):
+    def to_representation(self, value):
+        return User.objects.count()
+
+
+class CountingSharedSerializer(DefaultSharedSerializer):
+    user_count = UserCountField()
+
+
+def get(**data):
+    @inertia("Component/Path")
+    @api_view(["GET"])
+    def view(request):
+        return Response(data=data)
+
+    response = view(factory.get('/users', HTTP_X_INERTIA=True))
+    response.render()
+    return response
+
+
+def parse_header(header):
+    report = {}
+    for item in header.split(", "):
+        name, *params = item.split(";")
+        report[name] = dict(param.split("=") for param in params)
+    return report
+
+
+@override_settings(INERTIA_QUERY_CHECK=True)
+class QueryCheckTestCase(TestCase):
+    def setUp(self):
+        User.objects.bulk_create(User(username="user%d" % i) for i in range(3))
+
+    def test_queries_per_prop(self):
+        with self.assertLogs("drf_inertia.queries", logging.WARNING) as logs:
+            response = get(users=LazyProp(usernames), count=LazyProp(User.objects.count), title="Users")
+
+        report = parse_header(response["X-Inertia-Queries"])
+        assert report["users"]["count"] == "4"
+        assert report["users"]["repeated"] == "3"
+        assert report["count"]["count"] == "1"
+        assert report["count"]["repeated"] == "0"
+        assert report["shared.errors"]["count"] == "0"
+        assert "title" not in report
+
+        [message] = logs.output
+        assert "'users' ran 3 similar queries (possible N+1)" in message
+
+    @override_settings(INERTIA_SHARED_SERIALIZER='tests.test_queries.CountingSharedSerializer')
+    def test_queries_per_shared_field(self):
+        response = get()
+        assert parse_header(response["X-Inertia-Queries"])["shared.user_count"]["count"] == "1"
+
+    @override_settings(INERTIA_QUERY_THRESHOLD=3)
+    def test_threshold(self):
+        get(count=LazyProp(User.objects.count))
+
+        with pytest.raises(QueryThresholdExceeded, match=r"ran more than 3 queries in 'users' \(4\)"):
+            get(users=LazyProp(usernames))
+
+    @override_settings(INERTIA_QUERY_CHECK=False)
+    def test_disabled(self):
+        response = get(users=LazyProp(usernames))
+        assert "X-Inertia-Queries" not in response
+
+
+class QueryCounterTestCase(TestCase):
+    def test_normalize_sql(self):
+        assert normalize_sql('SELECT *\n  FROM "a" WHERE "id" IN (%s, %s, %s)') == 'SELECT * FROM "a" WHERE "id" IN (...)'
+        assert normalize_sql('SELECT * FROM "a" WHERE "id" IN (%s)') == 'SELECT * FROM "a" WHERE "id" IN (...)'
+
+    def test_report(self):
+        counter = QueryCounter()
+        with counter.count("users"):
+            User.objects.filter(pk__in=[1, 2]).count()
+            User.objects.filter(pk__in=[3]).count()
+        with counter.count("none"):
+            pass
+
+        count, ms, repeated = counter.get_report()["users"]
+        assert count == 2
+        assert ms >= 0
+        assert list(repeated.values()) == [2]
+        assert counter.get_report()["none"] == (0, 0, {})
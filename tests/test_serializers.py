@@ -0,0 +1,188 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib import messages
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.cache import SessionStore
+from django.test import TestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from drf_inertia.negotiation import Inertia
+from drf_inertia.cache import get_cache
+from drf_inertia.config import SHARED_CACHE_TIMEOUT
+from drf_inertia.serializers import (
+    CachedSharedField, DefaultSharedSerializer, InertiaSerializer, SharedField, get_page, has_messages,
+    invalidate_shared_fields)
+from drf_inertia.signals import shared_data_changed
+
+factory = APIRequestFactory()
+
+
+class PageTestCase(TestCase):
+    def get_context(self, **headers):
+        request = Request(factory.get('/users', **headers))
+        request.inertia = Inertia.from_request(request, "Users/List")
+        request.inertia.data = {"users": [1, 2]}
+        return {"request": request, "response": Response(), "view": None}
+
+    def test_get_page_matches_inertia_serializer(self):
+        context = self.get_context(HTTP_X_INERTIA=True, HTTP_X_INERTIA_VERSION="unversioned")
+        inertia = context["request"].inertia
+        assert get_page(inertia, context) == InertiaSerializer(inertia, context=context).data
+
+    def test_get_page_uses_current_version(self):
+        context = self.get_context()
+        page = get_page(context["request"].inertia, context)
+        assert page == {
+            "component": "Users/List",
+            "props": {"users": [1, 2], "errors": {}, "flash": {}},
+            "version": "unversioned",
+            "url": "/users",
+        }
+
+
+class CountingSharedSerializer(DefaultSharedSerializer):
+    calls = 0
+
+    teams = CachedSharedField()
+
+    def get_teams(self, request):
+        CountingSharedSerializer.calls += 1
+        return ["team-%s" % request.user.pk]
+
+
+@override_settings(INERTIA_SHARED_SERIALIZER='tests.test_serializers.CountingSharedSerializer')
+class CachedSharedFieldTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        CountingSharedSerializer.calls = 0
+        self.user = User.objects.create(username="user")
+        self.other = User.objects.create(username="other")
+
+    def get_teams(self, user):
+        request = Request(factory.get('/'))
+        request.user = user
+        request.inertia = Inertia.from_request(request, "Users/List")
+        context = {"request": request, "response": Response(), "view": None}
+        return get_page(request.inertia, context)["props"]["teams"]
+
+    def test_value_is_cached_per_user(self):
+        assert self.get_teams(self.user) == ["team-%s" % self.user.pk]
+        assert self.get_teams(self.user) == ["team-%s" % self.user.pk]
+        assert self.get_teams(self.other) == ["team-%s" % self.other.pk]
+        assert CountingSharedSerializer.calls == 2
+
+    def test_value_expires(self):
+        self.get_teams(self.user)
+        expired = time.time() + SHARED_CACHE_TIMEOUT + 1
+        with mock.patch("time.time", return_value=expired):
+            self.get_teams(self.user)
+        assert CountingSharedSerializer.calls == 2
+
+    def test_timeouts(self):
+        field = CachedSharedField(timeout=600, concurrent=True, concurrent_timeout=2)
+        assert field.cache_timeout == 600
+        assert field.timeout == 2
+        assert CachedSharedField().cache_timeout == SHARED_CACHE_TIMEOUT
+        assert CachedSharedField().timeout is None
+
+    def test_anonymous_without_session_is_not_cached(self):
+        self.get_teams(AnonymousUser())
+        self.get_teams(AnonymousUser())
+        assert CountingSharedSerializer.calls == 2
+
+    def test_invalidate_for_user(self):
+        self.get_teams(self.user)
+        self.get_teams(self.other)
+        invalidate_shared_fields(["teams"], user=self.user)
+        self.get_teams(self.user)
+        self.get_teams(self.other)
+        assert CountingSharedSerializer.calls == 3
+
+    def test_invalidate_with_signal(self):
+        self.get_teams(self.user)
+        self.get_teams(self.other)
+        shared_data_changed.send(sender=None, fields=["teams"])
+        self.get_teams(self.user)
+        self.get_teams(self.other)
+        assert CountingSharedSerializer.calls == 4
+
+
+class SessionDataTestCase(TestCase):
+    def render_props(self, session_key=None, cookies=None, load=False):
+        django_request = factory.get('/')
+        django_request.COOKIES.update(cookies or {})
+        django_request.session = SessionStore(session_key)
+        if load:
+            django_request.session.keys()
+        django_request._messages = FallbackStorage(django_request)
+        request = Request(django_request)
+        request.inertia = Inertia.from_request(request, "Users/List")
+        response = Response()
+        props = get_page(request.inertia, {"request": request, "response": response, "view": None})["props"]
+        return props, django_request, response
+
+    def create_session(self, **data):
+        session = SessionStore()
+        session.update(data)
+        session.save()
+        return session.session_key
+
+    def test_session_not_loaded_without_session_cookie(self):
+        props, request, response = self.render_props()
+        assert props["errors"] == {}
+        assert props["flash"] == {}
+        assert request.session.accessed is False
+
+    def test_session_not_loaded_without_errors_cookie(self):
+        session_key = self.create_session(errors={"name": ["required"]})
+        props, request, response = self.render_props(session_key)
+        assert props["errors"] == {}
+        assert request.session.accessed is False
+
+    def test_errors_read_with_errors_cookie(self):
+        session_key = self.create_session(errors={"name": ["required"]})
+        props, request, response = self.render_props(session_key, {"inertia_errors": "1"})
+        assert props["errors"] == {"name": ["required"]}
+        assert request.session.modified
+        assert response.cookies["inertia_errors"]["max-age"] == 0
+
+    def test_errors_read_from_loaded_session(self):
+        session_key = self.create_session(errors={"name": ["required"]})
+        props, request, response = self.render_props(session_key, load=True)
+        assert props["errors"] == {"name": ["required"]}
+
+    def test_queued_messages_are_flashed(self):
+        django_request = factory.get('/')
+        django_request.session = SessionStore()
+        django_request._messages = FallbackStorage(django_request)
+        assert has_messages(django_request) is False
+        messages.info(django_request, "Hello")
+        assert has_messages(django_request) is True
+
+
+class BarrierField(SharedField):
+    barrier = None
+
+    def to_representation(self, value):
+        BarrierField.barrier.wait()
+        return self.field_name
+
+
+class ConcurrentSharedSerializer(DefaultSharedSerializer):
+    first = BarrierField(concurrent=True)
+    second = BarrierField(concurrent=True)
+
+
+@override_settings(INERTIA_SHARED_SERIALIZER='tests.test_serializers.ConcurrentSharedSerializer')
+class ConcurrentSharedFieldTestCase(TestCase):
+    def test_concurrent_fields_run_on_thread_pool(self):
+        BarrierField.barrier = threading.Barrier(2, timeout=1)
+        request = Request(factory.get('/'))
+        request.inertia = Inertia.from_request(request, "Users/List")
+        props = get_page(request.inertia, {"request": request, "response": Response(), "view": None})["props"]
+        assert props == {"errors": {}, "flash": {}, "first": "first", "second": "second"}
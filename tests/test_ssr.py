@@ -0,0 +1,186 @@
+import json
+import logging
+import os
+import socketserver
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.test import TestCase, override_settings
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from drf_inertia.config import _registry
+from drf_inertia.decorators import inertia
+from drf_inertia.ssr import HTTPSSRClient, RenderedPage, SSRClient, SSRError, SSRRenderer
+
+factory = APIRequestFactory()
+rendered_pages = []
+
+
+class StubSSRClient(SSRClient):
+    fail = False
+
+    def render(self, page):
+        if self.fail:
+            raise SSRError("stub failure")
+
+        page = json.loads(page)
+        rendered_pages.append(page)
+        return RenderedPage(["<title>%s</title>" % page["component"]], '<div id="app">%s</div>' % page["props"]["name"])
+
+
+class FailingSSRClient(StubSSRClient):
+    fail = True
+
+
+TEMPLATES = [{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'OPTIONS': {
+        'loaders': [('django.template.loaders.locmem.Loader', {
+            'index.html': (
+                '<head>{{ inertia_ssr_head }}</head>'
+                '{% if inertia_ssr_body %}{{ inertia_ssr_body }}'
+                '{% else %}<div id="app" data-page="{{ inertia_json }}"></div>{% endif %}'),
+        })],
+    },
+}]
+
+
+def get(name="Jane", **extra):
+    @inertia("Users/Detail")
+    @api_view(["GET"])
+    def view(request):
+        return Response(data={"name": name})
+
+    extra.setdefault("HTTP_ACCEPT", "text/html")
+    response = view(factory.get('/users/1', **extra))
+    response.render()
+    return response
+
+
+@override_settings(TEMPLATES=TEMPLATES, INERTIA_SSR_ENABLED=True, INERTIA_SSR_CLIENT='tests.test_ssr.StubSSRClient')
+class SSRTestCase(TestCase):
+    def setUp(self):
+        rendered_pages.clear()
+        _registry.pop('INERTIA_SSR:instance', None)
+
+    def test_first_visit_is_server_side_rendered(self):
+        response = get()
+        assert response.content == b'<head><title>Users/Detail</title></head><div id="app">Jane</div>'
+        [page] = rendered_pages
+        assert page["url"] == "/users/1"
+
+    def test_rendered_pages_are_cached(self):
+        get()
+        get()
+        get(name="John")
+        assert [page["props"]["name"] for page in rendered_pages] == ["Jane", "John"]
+
+    @override_settings(INERTIA_SSR_CACHE_SIZE=0)
+    def test_cache_disabled(self):
+        get()
+        get()
+        assert len(rendered_pages) == 2
+
+    def test_inertia_requests_are_not_rendered(self):
+        response = get(HTTP_X_INERTIA=True)
+        assert json.loads(response.content)["props"]["name"] == "Jane"
+        assert rendered_pages == []
+
+    @override_settings(INERTIA_SSR_CLIENT='tests.test_ssr.FailingSSRClient')
+    def test_fallback_to_client_side_rendering(self):
+        with self.assertLogs("drf_inertia.ssr", logging.WARNING):
+            response = get()
+        assert response.content.startswith(b'<head></head><div id="app" data-page="{&quot;component&quot;')
+
+    @override_settings(INERTIA_SSR_ENABLED=False)
+    def test_disabled(self):
+        get()
+        assert rendered_pages == []
+
+
+class SSRRendererTestCase(TestCase):
+    def test_least_recently_used_pages_are_evicted(self):
+        rendered_pages.clear()
+        renderer = SSRRenderer(StubSSRClient(None, None), cache_size=2)
+        pages = [json.dumps({"component": "A", "props": {"name": name}}).encode() for name in "abc"]
+
+        for page in (pages[0], pages[1], pages[0], pages[2], pages[0], pages[1]):
+            renderer.render(page)
+        assert [page["props"]["name"] for page in rendered_pages] == ["a", "b", "c", "b"]
+
+
+class SSRHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.server.connections.add(self.connection)
+        page = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if page.get("sleep"):
+            time.sleep(page["sleep"])
+
+        if self.path == "/render":
+            content = json.dumps({"head": ["<title>SSR</title>"], "body": page["component"]}).encode()
+            self.send_response(200)
+        else:
+            content = b"not found"
+            self.send_response(404)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class HTTPSSRClientTestCase(TestCase):
+    def serve(self, server):
+        server.connections = set()
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_connections_are_reused(self):
+        server = self.serve(ThreadingHTTPServer(("127.0.0.1", 0), SSRHandler))
+        client = HTTPSSRClient("http://127.0.0.1:%d" % server.server_address[1], timeout=1)
+        self.addCleanup(client.close)
+
+        for component in ("A", "B", "C"):
+            rendered = client.render(json.dumps({"component": component}).encode())
+            assert rendered.body == component
+            assert rendered.head == ["<title>SSR</title>"]
+        assert len(server.connections) == 1
+
+    def test_timeout(self):
+        server = self.serve(ThreadingHTTPServer(("127.0.0.1", 0), SSRHandler))
+        client = HTTPSSRClient("http://127.0.0.1:%d" % server.server_address[1], timeout=0.05)
+        with pytest.raises(SSRError, match="timed out"):
+            client.render(json.dumps({"component": "A", "sleep": 0.2}).encode())
+
+    def test_server_not_running(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), SSRHandler)
+        port = server.server_address[1]
+        server.server_close()
+
+        with pytest.raises(SSRError):
+            HTTPSSRClient("http://127.0.0.1:%d" % port, timeout=1).render(b'{}')
+
+    def test_unix_socket(self):
+        class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            def get_request(self):
+                request, _ = super().get_request()
+                return request, ("local", 0)
+
+        path = os.path.join(tempfile.mkdtemp(), "ssr.sock")
+        self.serve(UnixHTTPServer(path, SSRHandler))
+
+        client = HTTPSSRClient("unix://" + path, timeout=1)
+        self.addCleanup(client.close)
+        assert client.render(b'{"component": "A"}').body == "A"
@@ -0,0 +1,151 @@
+import gzip
+import json
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth.models import User
+from django.http import StreamingHttpResponse
+from django.test import TestCase, override_settings
+from rest_framework import serializers
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from drf_inertia import props as inertia_props
+from drf_inertia.decorators import inertia
+from drf_inertia.props import LazyProp, StreamProp
+from drf_inertia.streaming import compress, get_content_encoding, iter_json, join_chunks
+
+factory = APIRequestFactory()
+
+
+class UsernameSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ["username"]
+
+
+def stream_view(**props):
+    @inertia("Rows/List")
+    @api_view(["GET"])
+    def view(request):
+        return Response(data=props)
+    return view
+
+
+def read(response):
+    return json.loads(b"".join(response.streaming_content))
+
+
+class StreamPropTestCase(TestCase):
+    def test_batches(self):
+        prop = StreamProp(range(5), transform=lambda i: i * 2, batch_size=2)
+        assert list(prop.iter_batches()) == [[0, 2], [4, 6], [8]]
+        assert list(prop) == [0, 2, 4, 6, 8]
+
+    def test_queryset_uses_iterator(self):
+        User.objects.bulk_create(User(username="user%d" % i) for i in range(3))
+        prop = StreamProp(User.objects.order_by("id"), serializer_class=UsernameSerializer, batch_size=2)
+        with self.assertNumQueries(1):
+            batches = list(prop.iter_batches())
+        assert batches == [[{"username": "user0"}, {"username": "user1"}], [{"username": "user2"}]]
+        assert prop.items._result_cache is None
+
+    def test_iter_json(self):
+        data = {"a": 1, "rows": StreamProp(iter([{"id": 1}, {"id": 2}, {"id": 3}]), batch_size=2),
+                "nested": {"empty": StreamProp([])}}
+        content = b"".join(iter_json(data))
+        assert json.loads(content) == {"a": 1, "rows": [{"id": 1}, {"id": 2}, {"id": 3}], "nested": {"empty": []}}
+
+    def test_join_chunks(self):
+        assert list(join_chunks([b"ab", b"c", b"de", b"f"], size=3)) == [b"abc", b"def"]
+        assert list(join_chunks([b"ab", b"c", b"d"], size=3)) == [b"abc", b"d"]
+
+
+class StreamingResponseTestCase(TestCase):
+    def test_stream_props_are_streamed(self):
+        view = stream_view(rows=StreamProp(range(3), transform=lambda i: {"id": i}, batch_size=2), title="Rows")
+        response = view(factory.get('/rows', HTTP_X_INERTIA=True))
+
+        assert isinstance(response, StreamingHttpResponse)
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/json"
+        assert response["X-Inertia"] == "true"
+        assert response["X-Inertia-Version"] == "unversioned"
+        assert "X-Inertia" in response["Vary"]
+        assert read(response) == {
+            "component": "Rows/List",
+            "props": {"rows": [{"id": 0}, {"id": 1}, {"id": 2}], "title": "Rows", "errors": {}, "flash": {}},
+            "version": "unversioned",
+            "url": "/rows",
+        }
+
+    def test_lazy_stream_props_are_streamed(self):
+        view = stream_view(rows=LazyProp(lambda: StreamProp(range(3))))
+        response = view(factory.get('/rows', HTTP_X_INERTIA=True))
+        assert read(response)["props"]["rows"] == [0, 1, 2]
+
+    def test_partial_reload_without_stream_props(self):
+        items = iter(range(3))
+        view = stream_view(rows=StreamProp(items), title="Rows")
+        response = view(factory.get(
+            '/rows', HTTP_X_INERTIA=True,
+            HTTP_X_INERTIA_PARTIAL_DATA="title", HTTP_X_INERTIA_PARTIAL_COMPONENT="Rows/List"))
+
+        assert not isinstance(response, StreamingHttpResponse)
+        assert json.loads(response.rendered_content)["props"] == {"title": "Rows"}
+        assert next(items) == 0
+
+    def test_responses_without_stream_props(self):
+        response = stream_view(rows=[1, 2])(factory.get('/rows', HTTP_X_INERTIA=True))
+        assert not isinstance(response, StreamingHttpResponse)
+        assert json.loads(response.rendered_content)["props"]["rows"] == [1, 2]
+
+    def test_props_are_resolved_once(self):
+        view = stream_view(rows=[1, 2], lazy=LazyProp(lambda: "lazy"))
+        with mock.patch.object(inertia_props, "select_props", wraps=inertia_props.select_props) as select_props:
+            response = view(factory.get('/rows', HTTP_X_INERTIA=True))
+            assert json.loads(response.rendered_content)["props"]["lazy"] == "lazy"
+        assert select_props.call_count == 1
+
+    def test_html_responses_include_stream_props(self):
+        view = stream_view(rows=StreamProp(range(3)))
+        response = view(factory.get('/rows', HTTP_ACCEPT="application/json"))
+        assert not isinstance(response, StreamingHttpResponse)
+        assert json.loads(response.rendered_content) == {"rows": [0, 1, 2]}
+
+    def test_compression(self):
+        request = factory.get('/', HTTP_ACCEPT_ENCODING="gzip, deflate")
+        assert get_content_encoding(request, compression=False) is None
+        assert get_content_encoding(request, compression=True) == "gzip"
+        assert get_content_encoding(factory.get('/'), compression=True) is None
+
+        chunks = [b'{"rows":[', b'1,2', b']}']
+        assert gzip.decompress(b"".join(compress(chunks, "gzip"))) == b'{"rows":[1,2]}'
+
+    @override_settings(INERTIA_STREAM_COMPRESSION=True)
+    def test_compression_setting(self):
+        view = stream_view(rows=StreamProp(range(3)))
+        response = view(factory.get('/rows', HTTP_X_INERTIA=True, HTTP_ACCEPT_ENCODING="gzip"))
+        assert response["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response["Vary"]
+        assert "X-Inertia" in response["Vary"]
+        assert response["Content-Type"] == "application/json"
+        assert json.loads(gzip.decompress(b"".join(response.streaming_content)))["props"]["rows"] == [0, 1, 2]
+
+    def test_async_view_stream_props_are_streamed(self):
+        adrf_views = pytest.importorskip("adrf.views")
+
+        async def get_rows():
+            return StreamProp(range(3))
+
+        @inertia("Rows/List")
+        class TestView(adrf_views.APIView):
+            async def get(self, request, **kwargs):
+                return Response(data={"rows": LazyProp(get_rows)})
+
+        response = async_to_sync(TestView.as_view())(factory.get('/rows', HTTP_X_INERTIA=True))
+        assert isinstance(response, StreamingHttpResponse)
+        assert read(response)["props"]["rows"] == [0, 1, 2]
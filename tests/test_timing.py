@@ -0,0 +1,118 @@
+import logging
+
+from django.test import TestCase, override_settings
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from drf_inertia.config import get_timing_collector_class
+from drf_inertia.decorators import inertia
+from drf_inertia.props import LazyProp, StreamProp
+from drf_inertia.serializers import DefaultSharedSerializer, SharedField
+from drf_inertia.timing import TimingCollector
+
+factory = APIRequestFactory()
+reports = []
+
+
+class RecordingCollector(TimingCollector):
+    server_timing = False
+
+    def report(self, request, response):
+        reports.append((request.path, response.status_code, dict(self.timings)))
+
+
+class SlowField(SharedField):
+    def to_representation(self, value):
+        return "slow"
+
+
+class TimedSharedSerializer(DefaultSharedSerializer):
+    slow = SlowField()
+    remote = SlowField(concurrent=True)
+
+
+def get_view(**data):
+    @inertia("Component/Path")
+    @api_view(["GET"])
+    def view(request):
+        return Response(data=data)
+    return view
+
+
+def stages(header):
+    return [timing.split(";")[0] for timing in header.split(", ")]
+
+
+class TimingTestCase(TestCase):
+    def setUp(self):
+        reports.clear()
+
+    @override_settings(INERTIA_TIMING=False)
+    def test_disabled(self):
+        assert get_timing_collector_class() is None
+        response = get_view()(factory.get('/', HTTP_X_INERTIA=True))
+        response.render()
+        assert "Server-Timing" not in response
+
+    @override_settings(INERTIA_TIMING=True)
+    def test_server_timing_header(self):
+        response = get_view(users=LazyProp(lambda: []))(factory.get('/', HTTP_X_INERTIA=True))
+        response.render()
+
+        assert set(stages(response["Server-Timing"])) == {
+            "initial", "inertia", "view", "props", "shared", "shared.errors", "shared.flash", "page", "encode"}
+        for timing in response["Server-Timing"].split(", "):
+            assert float(timing.split(";dur=")[1]) >= 0
+
+    @override_settings(INERTIA_TIMING=True)
+    def test_html_template_stage(self):
+        with override_settings(TEMPLATES=[{
+            'BACKEND': 'django.template.backends.django.DjangoTemplates',
+            'OPTIONS': {'loaders': [('django.template.loaders.locmem.Loader', {'index.html': '{{ inertia_json }}'})]},
+        }]):
+            response = get_view()(factory.get('/', HTTP_ACCEPT="text/html"))
+            response.render()
+        assert "template" in stages(response["Server-Timing"])
+
+    @override_settings(INERTIA_TIMING=True)
+    def test_streamed_responses(self):
+        response = get_view(rows=StreamProp(range(3)))(factory.get('/', HTTP_X_INERTIA=True))
+        assert stages(response["Server-Timing"])[-1] == "page"
+
+    @override_settings(INERTIA_TIMING=True,
+                       INERTIA_TIMING_COLLECTOR='tests.test_timing.RecordingCollector',
+                       INERTIA_SHARED_SERIALIZER='tests.test_timing.TimedSharedSerializer')
+    def test_collector_reports_shared_fields(self):
+        response = get_view()(factory.get('/page', HTTP_X_INERTIA=True))
+        response.render()
+
+        assert "Server-Timing" not in response
+        [(path, status_code, timings)] = reports
+        assert path == "/page"
+        assert status_code == 200
+        assert {"shared.slow", "shared.remote", "shared.errors", "shared.flash"} <= set(timings)
+
+    @override_settings(INERTIA_TIMING=True)
+    def test_default_collector_logs(self):
+        with self.assertLogs("drf_inertia.timing", logging.DEBUG) as logs:
+            get_view()(factory.get('/page', HTTP_X_INERTIA=True)).render()
+
+        [record] = logs.records
+        assert record.getMessage().startswith("GET /page inertia;dur=")
+        assert "view" in record.inertia_timings
+
+
+class TimingCollectorTestCase(TestCase):
+    def test_durations_are_added(self):
+        timing = TimingCollector()
+        timing.add("stage", 0.001)
+        timing.add("stage", 0.002)
+        timing.start("missing")
+        timing.stop("other")
+        assert timing.get_server_timing() == "stage;dur=3.000"
+
+    def test_timed(self):
+        timing = TimingCollector()
+        assert timing.timed("double", lambda x: x * 2)(2) == 4
+        assert list(timing.timings) == ["double"]